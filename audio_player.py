@@ -5,10 +5,340 @@ Cross-platform audio preview with basic controls
 """
 
 import os
+import atexit
+import mmap
+import sqlite3
+import subprocess
 import threading
 import time
-from typing import Optional, Callable
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Callable
+
+# Audio backend (pygame preferred, system command fallback)
+try:
+    import pygame
+    _HAS_PYGAME = True
+except ImportError:
+    pygame = None
+    _HAS_PYGAME = False
+
+# GUI imports (only needed for AudioPlayerWidget)
+try:
+    import tkinter as tk
+    from tkinter import ttk
+except ImportError:
+    tk = None
+    ttk = None
+
+# Optional header readers for duration lookup
+try:
+    from mutagen import File as MutagenFile
+except ImportError:
+    MutagenFile = None
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+# Mixer settings (512 samples ≈ 11.6ms at 44.1kHz)
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = 512
+
+# Formats pygame's music decoder can open
+PLAYABLE_FORMATS = frozenset({'.mp3', '.ogg', '.wav', '.flac', '.m4a', '.aiff'})
+
+# Formats where pygame.mixer.music.set_pos() can seek without reloading
+SEEKABLE_FORMATS = frozenset({'.ogg', '.mp3', '.wav'})
+
+DURATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "selecta", "duration_cache.sqlite")
+
+class DurationCache:
+    """Persistent duration cache keyed by (path, mtime, size)"""
+    
+    def __init__(self, db_path: str = DURATION_CACHE_PATH):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._dirty = False
+    
+    def _connect(self):
+        """Open the cache database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS durations (
+                    path TEXT PRIMARY KEY,
+                    mtime REAL,
+                    size INTEGER,
+                    duration REAL
+                )
+            ''')
+            self._conn.commit()
+            atexit.register(self.flush)
+        return self._conn
+    
+    def get(self, path: str, mtime: float, size: int) -> Optional[float]:
+        """Return the cached duration if the file is unchanged"""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT mtime, size, duration FROM durations WHERE path = ?', (path,)
+                ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error reading duration cache: {e}")
+            return None
+        
+        if row and row[0] == mtime and row[1] == size:
+            return row[2]
+        return None
+    
+    def put(self, path: str, mtime: float, size: int, duration: float):
+        """Store a duration (committed lazily by flush)"""
+        try:
+            with self._lock:
+                self._connect().execute(
+                    'INSERT OR REPLACE INTO durations (path, mtime, size, duration) VALUES (?, ?, ?, ?)',
+                    (path, mtime, size, duration)
+                )
+                self._dirty = True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error writing duration cache: {e}")
+    
+    def flush(self):
+        """Commit pending cache writes"""
+        with self._lock:
+            if self._conn is not None and self._dirty:
+                try:
+                    self._conn.commit()
+                    self._dirty = False
+                except sqlite3.Error as e:
+                    print(f"Error flushing duration cache: {e}")
+
+_duration_cache = DurationCache()
+
+# MPEG audio header tables (index by version bits: 0=MPEG2.5, 2=MPEG2, 3=MPEG1)
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+_MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0)
+_MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0)
+
+def _mp3_duration_fast(file_path: str) -> float:
+    """Get MP3 duration from the ID3/Xing headers without scanning frames
+    
+    Uses the Xing/Info frame count when present, otherwise assumes CBR and
+    derives the duration from the first frame's bitrate. Returns 0.0 if the
+    headers can't be parsed.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return 0.0  # Empty file
+        
+        with mm:
+            # Skip ID3v2 tag (synchsafe size in bytes 6-9)
+            offset = 0
+            if mm[0:3] == b'ID3' and len(mm) >= 10:
+                size = (mm[6] << 21) | (mm[7] << 14) | (mm[8] << 7) | mm[9]
+                offset = 10 + size + (10 if mm[5] & 0x10 else 0)
+            
+            # Locate the first frame sync within a small window
+            end = min(len(mm) - 4, offset + 65536)
+            pos = mm.find(b'\xff', offset, end)
+            while pos != -1 and (mm[pos + 1] & 0xE0) != 0xE0:
+                pos = mm.find(b'\xff', pos + 1, end)
+            if pos == -1:
+                return 0.0
+            
+            header = int.from_bytes(mm[pos:pos + 4], 'big')
+            version = (header >> 19) & 0x3
+            layer = (header >> 17) & 0x3
+            bitrate_index = (header >> 12) & 0xF
+            sr_index = (header >> 10) & 0x3
+            mono = ((header >> 6) & 0x3) == 3
+            
+            if version == 1 or layer != 1 or sr_index == 3:
+                return 0.0  # Reserved values or not Layer III
+            
+            sample_rate = _MPEG_SAMPLE_RATES[version][sr_index]
+            samples_per_frame = 1152 if version == 3 else 576
+            
+            # Xing/Info tag follows the side information
+            if version == 3:
+                side_info = 17 if mono else 32
+            else:
+                side_info = 9 if mono else 17
+            tag_pos = pos + 4 + side_info
+            if mm[tag_pos:tag_pos + 4] in (b'Xing', b'Info'):
+                flags = int.from_bytes(mm[tag_pos + 4:tag_pos + 8], 'big')
+                if flags & 0x1:
+                    frames = int.from_bytes(mm[tag_pos + 8:tag_pos + 12], 'big')
+                    return frames * samples_per_frame / sample_rate
+            
+            # No frame count: assume constant bitrate
+            bitrates = _MP3_BITRATES_V1 if version == 3 else _MP3_BITRATES_V2
+            bitrate = bitrates[bitrate_index] * 1000
+            if bitrate == 0:
+                return 0.0
+            return (len(mm) - pos) * 8 / bitrate
+
+# Single worker for file loading so disk IO stays off the Tk thread
+_load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="selecta-audio-load")
+
+class _PygameBackend:
+    """Playback through pygame.mixer.music"""
+    
+    name = "pygame"
+    
+    def _ensure_mixer(self, player):
+        """Open the pygame mixer (audio device) on first use"""
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=2, buffer=MIXER_BUFFER)
+            pygame.mixer.music.set_volume(player.volume)
+    
+    def accepts(self, file_path: str) -> bool:
+        """Check the extension before handing the file to the decoder"""
+        return os.path.splitext(file_path)[1].lower() in PLAYABLE_FORMATS
+    
+    def load(self, player, file_path: str, st: os.stat_result) -> bool:
+        try:
+            self._ensure_mixer(player)
+            pygame.mixer.music.load(file_path)
+            player.duration = player._get_duration_pygame(file_path, st)
+            return True
+        except Exception as e:
+            print(f"Error loading file with pygame: {e}")
+            return False
+    
+    def play(self, player) -> bool:
+        try:
+            self._ensure_mixer(player)
+            if player.is_paused:
+                pygame.mixer.music.unpause()
+            else:
+                pygame.mixer.music.play(start=player.position)
+                player._play_start_offset = player.position
+            
+            player._last_pos_ms = -1
+            player.is_playing = True
+            player.is_paused = False
+            return True
+            
+        except Exception as e:
+            print(f"Error playing with pygame: {e}")
+            return False
+    
+    def pause(self, player):
+        try:
+            pygame.mixer.music.pause()
+            player.is_paused = True
+        except:
+            pass
+    
+    def stop(self, player):
+        try:
+            pygame.mixer.music.stop()
+        except:
+            pass
+    
+    def set_volume(self, player):
+        try:
+            pygame.mixer.music.set_volume(player.volume)
+        except:
+            pass
+    
+    def seek(self, player):
+        if os.path.splitext(player.current_file)[1].lower() in SEEKABLE_FORMATS:
+            try:
+                # get_pos() keeps counting from the original play() call
+                pygame.mixer.music.set_pos(player.position)
+                player._play_start_offset = player.position - max(pygame.mixer.music.get_pos(), 0) / 1000.0
+                return
+            except Exception:
+                pass
+        
+        # No seek support for this codec, so restart from the new position
+        position = player.position
+        player.stop()
+        player.position = position
+        player.play()
+    
+    def update_position(self, player) -> bool:
+        try:
+            if not pygame.mixer.music.get_busy():
+                # Playback finished
+                return False
+            pos_ms = pygame.mixer.music.get_pos()
+        except:
+            return False
+        
+        if pos_ms >= 0:
+            # Position stalled while the mixer reports busy: count an underrun
+            if pos_ms == player._last_pos_ms:
+                player.glitch_count += 1
+            player._last_pos_ms = pos_ms
+            player.position = player._play_start_offset + pos_ms / 1000.0
+        return True
+
+class _SystemBackend:
+    """Playback through the macOS 'afplay' command"""
+    
+    name = "system"
+    
+    def accepts(self, file_path: str) -> bool:
+        return True
+    
+    def load(self, player, file_path: str, st: os.stat_result) -> bool:
+        # For system playback, we can't easily get duration
+        player.duration = 0.0
+        return True
+    
+    def play(self, player) -> bool:
+        try:
+            cmd = ["afplay", player.current_file]
+            # New session so terminate() reliably reaches afplay
+            player.system_process = subprocess.Popen(cmd, start_new_session=True)
+            player.is_playing = True
+            player.is_paused = False
+            player._play_start_offset = 0.0
+            player._play_started_at = time.time()
+            return True
+            
+        except Exception as e:
+            print(f"Error playing with system: {e}")
+            return False
+    
+    def pause(self, player):
+        # afplay can't pause, so stop the process
+        self.stop(player)
+        player.is_playing = False
+    
+    def stop(self, player):
+        if player.system_process:
+            try:
+                player.system_process.terminate()
+            except:
+                pass
+            # Dropping the handle lets subprocess reap the child without a waiter thread
+            player.system_process = None
+    
+    def set_volume(self, player):
+        pass
+    
+    def seek(self, player):
+        pass
+    
+    def update_position(self, player) -> bool:
+        if player.system_process is None or player.system_process.poll() is not None:
+            # afplay exited
+            return False
+        player.position = player._play_start_offset + (time.time() - player._play_started_at)
+        return True
 
 class AudioPlayer:
     """Simple audio player for file preview"""
@@ -20,145 +350,106 @@ class AudioPlayer:
         self.position = 0.0
         self.duration = 0.0
         self.volume = 0.7
+        self._play_start_offset = 0.0
+        self._play_started_at = 0.0
+        self.system_process = None
         
-        # Callbacks
-        self.position_callback: Optional[Callable] = None
-        self.finished_callback: Optional[Callable] = None
+        # Playout stats
+        self.glitch_count = 0
+        self._last_pos_ms = -1
         
-        # Try to import audio library
-        self.audio_backend = self._init_audio_backend()
+        # Select audio backend
+        self._backend = self._init_audio_backend()
+        self.audio_backend = self._backend.name
         
     def _init_audio_backend(self):
         """Initialize audio backend (prefer pygame for simplicity)"""
-        try:
-            import pygame
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)
-            return "pygame"
-        except ImportError:
-            try:
-                # Fallback to system command for macOS
-                return "system"
-            except:
-                return None
+        if _HAS_PYGAME:
+            # Mixer is opened lazily on first load/play
+            return _PygameBackend()
+        
+        # Fallback to system command for macOS
+        return _SystemBackend()
     
     def load_file(self, file_path: str) -> bool:
         """Load an audio file for playback"""
-        if not os.path.exists(file_path):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        
+        if not self._backend.accepts(file_path):
             return False
             
         self.stop()
         self.current_file = file_path
         self.position = 0.0
         
-        if self.audio_backend == "pygame":
+        return self._backend.load(self, file_path, st)
+    
+    def _get_duration_pygame(self, file_path: str, st: os.stat_result = None) -> float:
+        """Get audio duration, consulting the persistent cache first"""
+        if st is None:
             try:
-                import pygame
-                pygame.mixer.music.load(file_path)
-                # Try to get duration (basic approach)
-                self.duration = self._get_duration_pygame(file_path)
-                return True
-            except Exception as e:
-                print(f"Error loading file with pygame: {e}")
-                return False
+                st = os.stat(file_path)
+            except OSError:
+                return 0.0
         
-        elif self.audio_backend == "system":
-            # For system playback, we can't easily get duration
-            self.duration = 0.0
-            return True
-            
-        return False
+        if st.st_size == 0:
+            return 0.0  # Empty file, nothing to parse
+        
+        duration = _duration_cache.get(file_path, st.st_mtime, st.st_size)
+        if duration is not None:
+            return duration
+        
+        duration = self._read_header_duration(file_path)
+        if duration > 0:
+            _duration_cache.put(file_path, st.st_mtime, st.st_size, duration)
+        return duration
     
-    def _get_duration_pygame(self, file_path: str) -> float:
-        """Get audio duration (basic implementation)"""
-        try:
-            # This is a simplified approach - for production, use librosa or mutagen
-            from pathlib import Path
-            file_size = Path(file_path).stat().st_size
-            # Rough estimate: 1MB ≈ 8 seconds for typical audio
-            estimated_duration = file_size / (1024 * 1024) * 8
-            return min(estimated_duration, 300)  # Cap at 5 minutes
-        except:
-            return 120.0  # Default 2 minutes
+    def _read_header_duration(self, file_path: str) -> float:
+        """Get audio duration from container headers (no sample decoding)"""
+        if MutagenFile is not None:
+            try:
+                mf = MutagenFile(file_path)
+                if mf is not None and mf.info is not None:
+                    return float(mf.info.length)
+            except Exception:
+                pass
+        
+        # MP3 header parse when mutagen isn't available
+        if file_path.lower().endswith('.mp3'):
+            try:
+                duration = _mp3_duration_fast(file_path)
+                if duration > 0:
+                    return duration
+            except (OSError, IndexError) as e:
+                print(f"Error reading MP3 headers: {e}")
+        
+        # Fallback for PCM/FLAC containers
+        if soundfile is not None:
+            try:
+                return float(soundfile.info(file_path).duration)
+            except Exception:
+                pass
+        
+        return 0.0  # Unknown duration
     
     def play(self) -> bool:
         """Start playback"""
         if not self.current_file:
             return False
-            
-        if self.audio_backend == "pygame":
-            try:
-                import pygame
-                if self.is_paused:
-                    pygame.mixer.music.unpause()
-                else:
-                    pygame.mixer.music.play(start=self.position)
-                
-                self.is_playing = True
-                self.is_paused = False
-                
-                # Start position tracking thread
-                threading.Thread(target=self._track_position, daemon=True).start()
-                return True
-                
-            except Exception as e:
-                print(f"Error playing with pygame: {e}")
-                return False
-        
-        elif self.audio_backend == "system":
-            # Use macOS 'afplay' command
-            try:
-                import subprocess
-                cmd = ["afplay", self.current_file]
-                self.system_process = subprocess.Popen(cmd)
-                self.is_playing = True
-                self.is_paused = False
-                
-                # Start monitoring thread
-                threading.Thread(target=self._monitor_system_playback, daemon=True).start()
-                return True
-                
-            except Exception as e:
-                print(f"Error playing with system: {e}")
-                return False
-        
-        return False
+        return self._backend.play(self)
     
     def pause(self):
         """Pause playback"""
         if not self.is_playing:
             return
-            
-        if self.audio_backend == "pygame":
-            try:
-                import pygame
-                pygame.mixer.music.pause()
-                self.is_paused = True
-            except:
-                pass
-        
-        elif self.audio_backend == "system":
-            try:
-                if hasattr(self, 'system_process'):
-                    self.system_process.terminate()
-                self.is_playing = False
-            except:
-                pass
+        self._backend.pause(self)
     
     def stop(self):
         """Stop playback"""
-        if self.audio_backend == "pygame":
-            try:
-                import pygame
-                pygame.mixer.music.stop()
-            except:
-                pass
-        
-        elif self.audio_backend == "system":
-            try:
-                if hasattr(self, 'system_process'):
-                    self.system_process.terminate()
-            except:
-                pass
+        self._backend.stop(self)
         
         self.is_playing = False
         self.is_paused = False
@@ -166,26 +457,22 @@ class AudioPlayer:
     
     def set_volume(self, volume: float):
         """Set playback volume (0.0 to 1.0)"""
-        self.volume = max(0.0, min(1.0, volume))
+        volume = round(max(0.0, min(1.0, volume)), 2)
+        if volume == self.volume:
+            return
         
-        if self.audio_backend == "pygame":
-            try:
-                import pygame
-                pygame.mixer.music.set_volume(self.volume)
-            except:
-                pass
+        self.volume = volume
+        self._backend.set_volume(self)
     
     def seek(self, position: float):
         """Seek to position in seconds"""
         if not self.current_file or position < 0:
             return
             
-        self.position = min(position, self.duration)
+        self.position = min(position, self.duration) if self.duration > 0 else position
         
-        if self.is_playing and self.audio_backend == "pygame":
-            # Pygame doesn't support seeking easily, so restart from beginning
-            self.stop()
-            self.play()
+        if self.is_playing:
+            self._backend.seek(self)
     
     def get_position(self) -> float:
         """Get current playback position in seconds"""
@@ -195,125 +482,136 @@ class AudioPlayer:
         """Get total duration in seconds"""
         return self.duration
     
+    def get_stats(self) -> Dict:
+        """Get playout statistics (underrun count and mixer buffer latency)"""
+        return {
+            'glitches': self.glitch_count,
+            'latency_ms': MIXER_BUFFER / MIXER_FREQUENCY * 1000.0
+        }
+    
     def is_busy(self) -> bool:
         """Check if player is currently playing"""
         return self.is_playing and not self.is_paused
     
-    def _track_position(self):
-        """Track playback position (pygame)"""
-        start_time = time.time()
-        
-        while self.is_playing and not self.is_paused:
-            if self.audio_backend == "pygame":
-                try:
-                    import pygame
-                    if not pygame.mixer.music.get_busy():
-                        # Playback finished
-                        self.is_playing = False
-                        if self.finished_callback:
-                            self.finished_callback()
-                        break
-                except:
-                    break
-            
-            # Update position
-            elapsed = time.time() - start_time
-            self.position = min(self.position + elapsed, self.duration)
-            
-            # Call position callback
-            if self.position_callback:
-                self.position_callback(self.position)
-            
-            time.sleep(0.1)
-            start_time = time.time()
-    
-    def _monitor_system_playback(self):
-        """Monitor system playback process"""
-        if hasattr(self, 'system_process'):
-            self.system_process.wait()
+    def update_position(self) -> bool:
+        """Refresh the playback position; returns False once playback has finished"""
+        if not self._backend.update_position(self):
             self.is_playing = False
-            if self.finished_callback:
-                self.finished_callback()
+            return False
+        
+        if self.duration > 0:
+            self.position = min(self.position, self.duration)
+        return True
 
 class AudioPlayerWidget:
     """Tkinter widget for audio player controls"""
     
+    _FONT_BOLD = ('Arial', 10, 'bold')
+    _SECS_TABLE = [f"{i:02d}" for i in range(60)]
+    
     def __init__(self, parent):
-        import tkinter as tk
-        from tkinter import ttk
-        
         self.parent = parent
         self.player = AudioPlayer()
         self.current_file_id = None
         
         # Player state
         self.is_playing = False
+        self._tick_after = None
+        self._vol_after = None
+        self._cached_filename = ''
+        self._load_generation = 0  # bumped per load_file; older completions are ignored
+        self._cached_duration_str = "0:00"
+        self._last_position_secs = 0
         self.position_var = tk.StringVar(value="0:00")
         self.duration_var = tk.StringVar(value="0:00")
         
-        # Callbacks
-        self.player.position_callback = self._update_position
-        self.player.finished_callback = self._on_playback_finished
-        
         self.create_widget()
     
     def create_widget(self):
         """Create the player widget"""
-        import tkinter as tk
-        from tkinter import ttk
-        
         # Main player frame
         self.player_frame = ttk.LabelFrame(self.parent, text="🎵 Audio Player", padding="10")
+        self.player_frame.columnconfigure(0, weight=1)
         
         # Now playing info
         self.now_playing_var = tk.StringVar(value="No file loaded")
         now_playing_label = ttk.Label(self.player_frame, textvariable=self.now_playing_var, 
-                                     font=('Arial', 10, 'bold'))
-        now_playing_label.pack(fill=tk.X, pady=(0, 10))
+                                     font=self._FONT_BOLD)
+        now_playing_label.grid(row=0, column=0, sticky=tk.EW, pady=(0, 10))
         
         # Control buttons
         controls_frame = ttk.Frame(self.player_frame)
-        controls_frame.pack(fill=tk.X, pady=(0, 10))
+        controls_frame.grid(row=1, column=0, sticky=tk.EW, pady=(0, 10))
         
         self.play_btn = ttk.Button(controls_frame, text="▶️", command=self.toggle_play, width=3)
-        self.play_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.play_btn.grid(row=0, column=0, padx=(0, 5))
         
         self.stop_btn = ttk.Button(controls_frame, text="⏹️", command=self.stop, width=3)
-        self.stop_btn.pack(side=tk.LEFT, padx=(0, 10))
+        self.stop_btn.grid(row=0, column=1, padx=(0, 10))
         
         # Volume control
-        ttk.Label(controls_frame, text="🔊").pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Label(controls_frame, text="🔊").grid(row=0, column=2, padx=(10, 5))
         self.volume_scale = ttk.Scale(controls_frame, from_=0, to=100, orient=tk.HORIZONTAL,
                                      command=self._on_volume_change, length=100)
         self.volume_scale.set(70)  # Default volume
-        self.volume_scale.pack(side=tk.LEFT, padx=(0, 10))
+        self.volume_scale.grid(row=0, column=3, padx=(0, 10))
         
         # Position info
         position_frame = ttk.Frame(self.player_frame)
-        position_frame.pack(fill=tk.X)
+        position_frame.grid(row=2, column=0, sticky=tk.EW)
+        position_frame.columnconfigure(3, weight=1)
         
-        ttk.Label(position_frame, textvariable=self.position_var).pack(side=tk.LEFT)
-        ttk.Label(position_frame, text=" / ").pack(side=tk.LEFT)
-        ttk.Label(position_frame, textvariable=self.duration_var).pack(side=tk.LEFT)
+        ttk.Label(position_frame, textvariable=self.position_var).grid(row=0, column=0)
+        ttk.Label(position_frame, text=" / ").grid(row=0, column=1)
+        ttk.Label(position_frame, textvariable=self.duration_var).grid(row=0, column=2)
         
         # Position bar (simplified)
         self.position_bar = ttk.Progressbar(position_frame, mode='determinate')
-        self.position_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(10, 0))
+        self.position_bar.grid(row=0, column=3, sticky=tk.EW, padx=(10, 0))
     
-    def load_file(self, file_path: str, file_id: int = None):
-        """Load a file for playback"""
-        if self.player.load_file(file_path):
+    def load_file(self, file_path: str, file_id: int = None, on_loaded: Optional[Callable] = None):
+        """Load a file for playback in the background
+        
+        on_loaded(success) is called on the Tk thread once loading finishes.
+        """
+        self._cancel_ticking()
+        self.play_btn.config(text="▶️")
+        self.is_playing = False
+        self._cached_filename = os.path.basename(file_path)
+        self.now_playing_var.set(f"Loading: {self._cached_filename}")
+        
+        self._load_generation += 1
+        generation = self._load_generation
+        future = _load_executor.submit(self.player.load_file, file_path)
+        future.add_done_callback(
+            lambda f: self.parent.after(0, self._on_load_done, f, generation, file_id, on_loaded)
+        )
+    
+    def _on_load_done(self, future, generation: int, file_id: int, on_loaded: Optional[Callable]):
+        """Update the widget after a background load completes"""
+        if generation != self._load_generation:
+            return  # superseded by a newer load_file; that load reports instead
+        
+        try:
+            success = future.result()
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            success = False
+        
+        if success:
             self.current_file_id = file_id
-            filename = os.path.basename(file_path)
-            self.now_playing_var.set(f"Loaded: {filename}")
+            self.now_playing_var.set(f"Loaded: {self._cached_filename}")
             
             # Update duration
             duration = self.player.get_duration()
-            self.duration_var.set(self._format_time(duration))
-            self.position_bar.config(maximum=duration)
-            
-            return True
-        return False
+            self._cached_duration_str = self._format_time(duration)
+            self.duration_var.set(self._cached_duration_str)
+            self.position_bar['maximum'] = duration
+        else:
+            self.now_playing_var.set("No file loaded")
+        
+        if on_loaded:
+            on_loaded(success)
     
     def toggle_play(self):
         """Toggle play/pause"""
@@ -325,33 +623,67 @@ class AudioPlayerWidget:
             if self.player.play():
                 self.play_btn.config(text="⏸️")
                 self.is_playing = True
+                self._start_ticking()
                 # Update now playing
                 if self.player.current_file:
-                    filename = os.path.basename(self.player.current_file)
-                    self.now_playing_var.set(f"🎵 Playing: {filename}")
+                    self.now_playing_var.set(f"🎵 Playing: {self._cached_filename}")
     
     def stop(self):
         """Stop playback"""
+        self._cancel_ticking()
         self.player.stop()
         self.play_btn.config(text="▶️")
         self.is_playing = False
         self.position_var.set("0:00")
-        self.position_bar.config(value=0)
+        self._last_position_secs = 0
+        self.position_bar['value'] = 0
         
         if self.player.current_file:
-            filename = os.path.basename(self.player.current_file)
-            self.now_playing_var.set(f"Stopped: {filename}")
+            self.now_playing_var.set(f"Stopped: {self._cached_filename}")
     
     def _on_volume_change(self, value):
-        """Handle volume change"""
-        volume = float(value) / 100.0
+        """Handle volume change (debounced so a drag only applies its last value)"""
+        if self._vol_after is not None:
+            self.parent.after_cancel(self._vol_after)
+        self._vol_after = self.parent.after(30, self._apply_volume, float(value) / 100.0)
+    
+    def _apply_volume(self, volume: float):
+        """Apply a debounced volume change"""
+        self._vol_after = None
         self.player.set_volume(volume)
     
+    def _start_ticking(self):
+        """Start position updates on the Tk main loop"""
+        self._cancel_ticking()
+        self._tick()
+    
+    def _cancel_ticking(self):
+        """Cancel any pending position update"""
+        if self._tick_after is not None:
+            self.parent.after_cancel(self._tick_after)
+            self._tick_after = None
+    
+    def _tick(self):
+        """Poll the player and reschedule while playback is running"""
+        self._tick_after = None
+        if not self.player.is_busy():
+            return
+        
+        if self.player.update_position():
+            self._update_position(self.player.get_position())
+            self._tick_after = self.parent.after(100, self._tick)
+        else:
+            self._on_playback_finished()
+    
     def _update_position(self, position: float):
         """Update position display"""
         try:
-            self.position_var.set(self._format_time(position))
-            self.position_bar.config(value=position)
+            # Only touch the label when the displayed second changes
+            secs = int(position)
+            if secs != self._last_position_secs:
+                self._last_position_secs = secs
+                self.position_var.set(self._format_time(position))
+            self.position_bar['value'] = position
         except:
             pass  # Handle case where widget is destroyed
     
@@ -362,8 +694,7 @@ class AudioPlayerWidget:
             self.is_playing = False
             
             if self.player.current_file:
-                filename = os.path.basename(self.player.current_file)
-                self.now_playing_var.set(f"Finished: {filename}")
+                self.now_playing_var.set(f"Finished: {self._cached_filename}")
         except:
             pass
     
@@ -371,7 +702,7 @@ class AudioPlayerWidget:
         """Format time as MM:SS"""
         mins = int(seconds // 60)
         secs = int(seconds % 60)
-        return f"{mins}:{secs:02d}"
+        return f"{mins}:{self._SECS_TABLE[secs]}"
     
     def pack(self, **kwargs):
         """Pack the player frame"""
@@ -8,22 +8,159 @@ import os
 import numpy as np
 import pandas as pd
 import librosa
+import soundfile as sf
 import joblib
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, accuracy_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import LabelEncoder
+from sklearn import config_context
+from threadpoolctl import threadpool_limits
 import json
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
+from functools import partial
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# librosa>=0.10 resamples with soxr by default, which is faster than resampy's kaiser_fast;
+# keep it pinned so features match what the shipped models were trained on
+RESAMPLE_TYPE = 'soxr_hq'
+
+# Model archives use lz4 when available (much faster than zlib at a similar ratio)
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESS = ('lz4', 3)
+except ImportError:
+    MODEL_COMPRESS = ('zlib', 3)
+
+# On-disk cache of extracted feature vectors (skips librosa on re-runs); opened only when training
+FEATURE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "selecta", "features")
+
+# Part of every feature cache key; bump whenever extract_enhanced_features changes its output
+FEATURE_VERSION = 1
+
+def feature_dim(n_mfcc=13):
+    """Length of the vector returned by extract_enhanced_features"""
+    # mfcc stats + centroid/rolloff/zcr mean+std + tempo + chroma (12) and contrast (7) mean+std
+    return 4 * n_mfcc + 3 * 2 + 1 + 2 * 12 + 2 * 7
+
+FEATURE_DIM = feature_dim()
+
+def _label_encoder(classes):
+    """LabelEncoder with classes_ preset from an already sorted, unique label array"""
+    le = LabelEncoder()
+    le.classes_ = np.asarray(classes)
+    return le
+
+def _encode_labels(le, labels):
+    """Vectorized le.transform via binary search, as compact integer codes"""
+    dtype = np.int8 if len(le.classes_) <= np.iinfo(np.int8).max else np.int16
+    return np.searchsorted(le.classes_, np.asarray(labels)).astype(dtype)
+
+if _HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _stats4(M, out):
+        """Fused single pass: out = [mean..., std..., max..., min...] per row of M"""
+        R, T = M.shape
+        for r in range(R):
+            s = 0.0
+            sq = 0.0
+            mn = M[r, 0]
+            mx = M[r, 0]
+            for t in range(T):
+                v = M[r, t]
+                s += v
+                sq += v * v
+                if v < mn:
+                    mn = v
+                if v > mx:
+                    mx = v
+            mean = s / T
+            out[r] = mean
+            out[R + r] = np.sqrt(max(sq / T - mean * mean, 0.0))
+            out[2 * R + r] = mx
+            out[3 * R + r] = mn
+    
+    @njit(cache=True)
+    def _centroid_rolloff(S, freqs, roll_percent, centroid, rolloff):
+        """Per-frame spectral centroid and rolloff of a magnitude spectrogram, walking S row by row"""
+        n_bins, n_frames = S.shape
+        # float32 running sums, as np.cumsum accumulates S in librosa's rolloff
+        total = np.zeros(n_frames, dtype=np.float32)
+        weighted = np.zeros(n_frames)
+        for f in range(n_bins):
+            for t in range(n_frames):
+                total[t] += S[f, t]
+                weighted[t] += freqs[f] * S[f, t]
+        
+        threshold = np.empty(n_frames, dtype=np.float32)
+        for t in range(n_frames):
+            centroid[t] = weighted[t] / total[t] if total[t] > 0 else 0.0
+            threshold[t] = roll_percent * total[t]
+            rolloff[t] = freqs[n_bins - 1]
+        
+        acc = np.zeros(n_frames, dtype=np.float32)
+        found = np.zeros(n_frames, dtype=np.bool_)
+        remaining = n_frames
+        for f in range(n_bins):
+            for t in range(n_frames):
+                if not found[t]:
+                    acc[t] += S[f, t]
+                    if acc[t] >= threshold[t]:
+                        rolloff[t] = freqs[f]
+                        found[t] = True
+                        remaining -= 1
+            if remaining == 0:
+                break
+
+def _spectral_shape(S, sr, n_fft=2048, roll_percent=0.85):
+    """Spectral centroid and rolloff rows (librosa.feature.spectral_centroid/rolloff on S)"""
+    if _HAS_NUMBA:
+        freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+        centroid = np.empty((1, S.shape[1]), dtype=np.float32)
+        rolloff = np.empty((1, S.shape[1]), dtype=np.float32)
+        _centroid_rolloff(np.ascontiguousarray(S, dtype=np.float32), freqs, np.float32(roll_percent),
+                          centroid[0], rolloff[0])
+        return centroid, rolloff
+    return (librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=n_fft),
+            librosa.feature.spectral_rolloff(S=S, sr=sr, n_fft=n_fft, roll_percent=roll_percent))
+
+def _warm_up_kernels():
+    """Load (or compile) the numba kernels now rather than on the first file"""
+    if _HAS_NUMBA:
+        M = np.ones((2, 4), dtype=np.float32)
+        _stats(M)
+        _spectral_shape(M, 22050, n_fft=2)
+
+def _stats(M):
+    """Per-row mean, std, max and min of a 2-D feature matrix as one float32 vector"""
+    M = np.ascontiguousarray(M, dtype=np.float32)
+    if _HAS_NUMBA:
+        out = np.empty(4 * M.shape[0], dtype=np.float32)
+        _stats4(M, out)
+        return out
+    return np.concatenate((M.mean(axis=1), M.std(axis=1), M.max(axis=1), M.min(axis=1)))
+
+def _mean_std(M):
+    """Per-row mean and std of a 2-D feature matrix as one float32 vector"""
+    if _HAS_NUMBA:
+        return _stats(M)[:2 * len(M)]
+    M = np.asarray(M, dtype=np.float32)
+    return np.concatenate((M.mean(axis=1), M.std(axis=1)))
+
 class HierarchicalAudioClassifier:
     """Multi-level audio classification system"""
     
-    def __init__(self, strategy='cascade'):
+    def __init__(self, strategy='cascade', min_sub_confidence_gate=0.4):
         """
         Initialize hierarchical classifier
         
@@ -31,91 +168,141 @@ class HierarchicalAudioClassifier:
         - 'cascade': Main category first, then subcategory
         - 'flat': Single model with all subcategories  
         - 'ensemble': Multiple models per main category
+        
+        Cascade skips subcategory inference when main confidence is below
+        min_sub_confidence_gate (set 0 to always run it).
         """
         self.strategy = strategy
+        self.min_sub_confidence_gate = min_sub_confidence_gate
         self.main_model = None
         self.sub_models = {}
         self.scalers = {}
+        self._affine = {}  # name -> (mean, 1/scale) as float32
+        self.quantizer = None  # (mins, 255 / range) per feature, None for legacy models
         self.label_encoders = {}
         self.category_structure = {}
         
-    def extract_enhanced_features(self, file_path, sr=22050, n_mfcc=13):
+    def _fit_quantizer(self, X):
+        """Learn per-feature min-max ranges and return X quantized to uint8"""
+        mins = X.min(axis=0).astype(np.float32)
+        span = X.max(axis=0).astype(np.float32) - mins
+        scale = np.where(span > 0, 255.0 / np.where(span > 0, span, 1.0), 0.0).astype(np.float32)
+        self.quantizer = (mins, scale)
+        return self._quantize(X)
+    
+    def _quantize(self, X):
+        """Map features onto the training min-max range as uint8 (no-op for legacy models)"""
+        if self.quantizer is None:
+            return X
+        mins, scale = self.quantizer
+        Xq = np.asarray(X, dtype=np.float32) - mins
+        Xq *= scale
+        np.clip(Xq, 0, 255, out=Xq)
+        return np.rint(Xq, out=Xq).astype(np.uint8)
+    
+    def _set_scaler(self, name, scaler):
+        """Store a fitted scaler along with its float32 affine parameters"""
+        self.scalers[name] = scaler
+        self._affine[name] = (scaler.mean_.astype(np.float32),
+                              (1.0 / scaler.scale_).astype(np.float32))
+    
+    def _transform(self, name, X):
+        """Apply scaler `name` as a single (X - mean) * inv_scale pass (models saved with one)"""
+        if name not in self._affine:
+            return X
+        mean, inv_scale = self._affine[name]
+        Xs = np.asarray(X, dtype=np.float32) - mean
+        Xs *= inv_scale
+        return Xs
+    
+    @staticmethod
+    def _new_model(n_samples, max_iter=300):
+        """Histogram gradient boosting; early stopping only when there is enough data to hold out"""
+        return HistGradientBoostingClassifier(
+            max_iter=max_iter,
+            max_depth=None,
+            learning_rate=0.05,
+            early_stopping=n_samples >= 200,
+            validation_fraction=0.1,
+            random_state=42
+        )
+    
+    @staticmethod
+    def load_audio(file_path, sr=22050, duration=30.0):
+        """Decode the first `duration` seconds as mono float32 at `sr`"""
+        try:
+            info = sf.info(file_path)
+        except RuntimeError:
+            # Not readable by libsndfile (e.g. m4a) - let librosa/audioread handle it
+            y, _ = librosa.load(file_path, sr=sr, duration=duration, mono=True, res_type=RESAMPLE_TYPE)
+            return y
+        
+        y, native_sr = sf.read(file_path, frames=int(duration * info.samplerate),
+                               dtype='float32', always_2d=False)
+        if y.ndim == 2:
+            y = y.mean(axis=1)
+        if native_sr != sr:
+            y = librosa.resample(y, orig_sr=native_sr, target_sr=sr, res_type=RESAMPLE_TYPE)
+        return y
+    
+    @staticmethod
+    def extract_enhanced_features(file_path, sr=22050, n_mfcc=13):
         """Extract comprehensive audio features - same as main classifier"""
         try:
             # Load audio
-            y, sr = librosa.load(file_path, sr=sr, duration=30.0)
+            y = HierarchicalAudioClassifier.load_audio(file_path, sr=sr)
             
             if len(y) == 0:
                 return None
                 
-            # Basic features
-            features = []
+            # One STFT shared by every spectral feature below
+            S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+            S_power = S ** 2
             
             # MFCCs (13 coefficients)
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-            features.extend([
-                np.mean(mfccs, axis=1),
-                np.std(mfccs, axis=1),
-                np.max(mfccs, axis=1),
-                np.min(mfccs, axis=1)
-            ])
+            mel = librosa.feature.melspectrogram(S=S_power, sr=sr)
+            log_mel = librosa.power_to_db(mel)
+            mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=n_mfcc)
             
             # Spectral features
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            features.extend([
-                np.mean(spectral_centroids),
-                np.std(spectral_centroids)
-            ])
-            
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            features.extend([
-                np.mean(spectral_rolloff),
-                np.std(spectral_rolloff)
-            ])
-            
-            zero_crossings = librosa.feature.zero_crossing_rate(y)[0]
-            features.extend([
-                np.mean(zero_crossings),
-                np.std(zero_crossings)
-            ])
+            spectral_centroids, spectral_rolloff = _spectral_shape(S, sr)
+            zero_crossings = librosa.feature.zero_crossing_rate(y)
             
-            # Tempo and rhythm
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            features.append(tempo)
+            # Tempo and rhythm - same onset envelope beat_track uses, without the beat tracking pass
+            onset_env = librosa.onset.onset_strength(S=log_mel, sr=sr, aggregate=np.median)
+            if onset_env.any():
+                tempo = librosa.feature.rhythm.tempo(onset_envelope=onset_env, sr=sr)
+            else:
+                tempo = 0.0
             
             # Chroma features
-            chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-            features.extend([
-                np.mean(chroma, axis=1),
-                np.std(chroma, axis=1)
-            ])
+            chroma = librosa.feature.chroma_stft(S=S_power, sr=sr)
             
             # Spectral contrast
-            contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
-            features.extend([
-                np.mean(contrast, axis=1),
-                np.std(contrast, axis=1)
-            ])
-            
-            # Flatten all features
-            flattened_features = []
-            for feature in features:
-                if isinstance(feature, np.ndarray):
-                    flattened_features.extend(feature.flatten())
-                else:
-                    flattened_features.append(feature)
+            contrast = librosa.feature.spectral_contrast(S=S, sr=sr)
             
-            return np.array(flattened_features)
+            return np.concatenate((
+                _stats(mfccs),
+                _mean_std(spectral_centroids),
+                _mean_std(spectral_rolloff),
+                _mean_std(zero_crossings),
+                np.atleast_1d(tempo).astype(np.float32),
+                _mean_std(chroma),
+                _mean_std(contrast),
+            ))
             
         except Exception as e:
             print(f"Error extracting features from {file_path}: {e}")
             return None
     
-    def load_hierarchical_data(self, data_dir='data/new_sub_categories_large'):
-        """Load hierarchical training data"""
+    def load_hierarchical_data(self, data_dir='data/new_sub_categories_large', use_cache=True):
+        """Load hierarchical training data
+        
+        With use_cache, feature vectors are reused from FEATURE_CACHE_DIR for
+        files whose mtime and size are unchanged since the last run.
+        """
         print(f"📂 Loading hierarchical data from {data_dir}...")
         
-        features_list = []
         main_labels = []
         sub_labels = []
         full_labels = []  # main_category/sub_category
@@ -128,8 +315,8 @@ class HierarchicalAudioClassifier:
         if not data_path.exists():
             raise ValueError(f"Data directory {data_dir} not found")
         
-        total_samples = 0
-        processed_samples = 0
+        # Collect (file, main, sub) tasks first so extraction can run in parallel
+        tasks = []
         
         for main_cat_dir in data_path.iterdir():
             if not main_cat_dir.is_dir():
@@ -147,24 +334,36 @@ class HierarchicalAudioClassifier:
                 sub_category = sub_cat_dir.name
                 self.category_structure[main_category].append(sub_category)
                 
-                # Count and process wav files
+                # Count wav files
                 wav_files = list(sub_cat_dir.glob('*.wav'))
-                total_samples += len(wav_files)
-                
                 print(f"   📁 {sub_category}: {len(wav_files)} samples")
                 
-                for wav_file in wav_files:
-                    features = self.extract_enhanced_features(str(wav_file))
-                    if features is not None:
-                        features_list.append(features)
-                        main_labels.append(main_category)
-                        sub_labels.append(sub_category)
-                        full_labels.append(f"{main_category}/{sub_category}")
-                        processed_samples += 1
-                    
-                    # Progress update
-                    if processed_samples % 100 == 0:
-                        print(f"      Processed {processed_samples}/{total_samples} samples")
+                tasks.extend((str(wav_file), main_category, sub_category) for wav_file in wav_files)
+        
+        total_samples = len(tasks)
+        print(f"\n⚙️ Extracting features from {total_samples} samples across all CPU cores...")
+        
+        # Each librosa call is independent, so fan out across processes
+        if use_cache:
+            memory = joblib.Memory(FEATURE_CACHE_DIR, verbose=0)
+            extract = partial(_extract_features_cached, memory.cache(_extract_features_keyed))
+        else:
+            extract = _extract_features
+        results = Parallel(n_jobs=-1, backend='loky', batch_size='auto', verbose=5)(
+            delayed(extract)(file_path) for file_path, _, _ in tasks
+        )
+        
+        # Write rows straight into a float32 matrix; failed files are masked out
+        X = np.empty((total_samples, FEATURE_DIM), dtype=np.float32)
+        ok = np.zeros(total_samples, dtype=bool)
+        for i, ((file_path, main_category, sub_category), features) in enumerate(zip(tasks, results)):
+            if features is not None:
+                X[i] = features
+                ok[i] = True
+                main_labels.append(main_category)
+                sub_labels.append(sub_category)
+                full_labels.append(f"{main_category}/{sub_category}")
+        processed_samples = int(ok.sum())
         
         print(f"\n✅ Successfully processed {processed_samples}/{total_samples} samples")
         print(f"📊 Category structure: {self.category_structure}")
@@ -172,116 +371,90 @@ class HierarchicalAudioClassifier:
         if processed_samples == 0:
             raise ValueError("No samples were successfully processed!")
         
-        return np.array(features_list), main_labels, sub_labels, full_labels
+        if processed_samples < total_samples:
+            X = X[ok]
+        
+        return X, main_labels, sub_labels, full_labels
     
     def train_cascade_strategy(self, X, main_labels, sub_labels):
         """Train cascade strategy: main category first, then subcategories"""
         print("\n🔄 Training CASCADE strategy...")
         
+        # Tree models only need ordinal features; keep the design matrix as uint8
+        X = self._fit_quantizer(X)
+        
+        # Vectorized label lookups instead of Python-level scans
+        main_arr = np.asarray(main_labels)
+        sub_arr = np.asarray(sub_labels)
+        
         # 1. Train main category classifier
         print("\n1️⃣ Training main category classifier...")
         
+        # Encode main category labels once, before splitting
+        main_le = _label_encoder(np.unique(main_arr))
+        y_main = _encode_labels(main_le, main_arr)
+        
         # Split data for main categories
-        X_train, X_test, y_main_train, y_main_test, y_sub_train, y_sub_test = train_test_split(
-            X, main_labels, sub_labels, test_size=0.2, random_state=42, stratify=main_labels
+        X_train, X_test, y_main_train_encoded, y_main_test_encoded = train_test_split(
+            X, y_main, test_size=0.2, random_state=42, stratify=y_main
         )
         
-        # Scale features for main model
-        main_scaler = StandardScaler()
-        X_train_scaled = main_scaler.fit_transform(X_train)
-        X_test_scaled = main_scaler.transform(X_test)
-        
-        # Encode main category labels
-        main_le = LabelEncoder()
-        y_main_train_encoded = main_le.fit_transform(y_main_train)
-        y_main_test_encoded = main_le.transform(y_main_test)
-        
-        # Train main classifier (Random Forest - our best performer)
-        self.main_model = RandomForestClassifier(
-            n_estimators=200, 
-            max_depth=20, 
-            min_samples_split=2,
-            random_state=42,
-            n_jobs=-1
-        )
+        # Train main classifier (histogram gradient boosting - scale-invariant, no scaler)
+        self.main_model = self._new_model(len(X_train))
         
-        self.main_model.fit(X_train_scaled, y_main_train_encoded)
+        self.main_model.fit(X_train, y_main_train_encoded)
         
         # Evaluate main model
-        main_pred = self.main_model.predict(X_test_scaled)
+        main_pred = self.main_model.predict(X_test)
         main_accuracy = accuracy_score(y_main_test_encoded, main_pred)
         
         print(f"   ✅ Main category accuracy: {main_accuracy:.1%}")
         
         # Store main model components
-        self.scalers['main'] = main_scaler
+        self.scalers = {}
+        self._affine = {}
         self.label_encoders['main'] = main_le
         
         # 2. Train subcategory classifiers for each main category
         print("\n2️⃣ Training subcategory classifiers...")
         
+        jobs = []
         for main_category in self.category_structure.keys():
             # Get samples for this main category
-            main_cat_indices = [i for i, label in enumerate(main_labels) if label == main_category]
+            main_cat_indices = np.flatnonzero(main_arr == main_category)
             
             if len(main_cat_indices) < 10:  # Skip if too few samples
                 print(f"   ⚠️ Skipping {main_category}: insufficient samples ({len(main_cat_indices)})")
                 continue
                 
             # Extract subcategory data
-            X_sub = X[main_cat_indices]
-            y_sub = [sub_labels[i] for i in main_cat_indices]
+            y_sub = sub_arr[main_cat_indices]
             
             # Check if we have multiple subcategories
-            unique_subcats = list(set(y_sub))
+            unique_subcats = np.unique(y_sub)
             if len(unique_subcats) < 2:
-                print(f"   ⚠️ Skipping {main_category}: only one subcategory ({unique_subcats})")
+                print(f"   ⚠️ Skipping {main_category}: only one subcategory ({list(unique_subcats)})")
                 continue
             
-            print(f"   🎯 Training {main_category} subcategory classifier...")
-            print(f"      Subcategories: {unique_subcats}")
-            print(f"      Samples: {len(X_sub)}")
-            
-            # Split subcategory data
-            if len(X_sub) > 10:
-                X_sub_train, X_sub_test, y_sub_train, y_sub_test = train_test_split(
-                    X_sub, y_sub, test_size=0.2, random_state=42, stratify=y_sub
-                )
-            else:
-                # Use all data for training if very small dataset
-                X_sub_train, X_sub_test = X_sub, X_sub
-                y_sub_train, y_sub_test = y_sub, y_sub
-            
-            # Scale subcategory features
-            sub_scaler = StandardScaler()
-            X_sub_train_scaled = sub_scaler.fit_transform(X_sub_train)
-            X_sub_test_scaled = sub_scaler.transform(X_sub_test)
-            
-            # Encode subcategory labels
-            sub_le = LabelEncoder()
-            y_sub_train_encoded = sub_le.fit_transform(y_sub_train)
-            y_sub_test_encoded = sub_le.transform(y_sub_test)
-            
-            # Train subcategory classifier
-            sub_model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=2,
-                random_state=42,
-                n_jobs=-1
-            )
-            
-            sub_model.fit(X_sub_train_scaled, y_sub_train_encoded)
-            
-            # Evaluate subcategory model
-            if len(X_sub_test) > 0:
-                sub_pred = sub_model.predict(X_sub_test_scaled)
-                sub_accuracy = accuracy_score(y_sub_test_encoded, sub_pred)
+            jobs.append((main_category, main_cat_indices, y_sub))
+        
+        # Fit the sub models side by side, splitting cores between them
+        n_cpu = os.cpu_count() or 1
+        n_outer = max(1, min(len(jobs), n_cpu))
+        n_inner = max(1, n_cpu // n_outer)
+        results = Parallel(n_jobs=n_outer, backend='loky')(
+            delayed(_fit_sub)(X[idx], y_sub, 42, n_inner) for _, idx, y_sub in jobs
+        )
+        
+        for (main_category, idx, y_sub), (sub_model, sub_le, sub_accuracy) in zip(jobs, results):
+            print(f"   🎯 Trained {main_category} subcategory classifier")
+            print(f"      Subcategories: {list(sub_le.classes_)}")
+            print(f"      Samples: {len(idx)}")
+            if sub_accuracy is not None:
                 print(f"      ✅ {main_category} subcategory accuracy: {sub_accuracy:.1%}")
             
             # Store subcategory model components
             self.sub_models[main_category] = sub_model
-            self.scalers[main_category] = sub_scaler
             self.label_encoders[main_category] = sub_le
         
         print(f"\n🎉 Cascade training completed!")
@@ -294,6 +467,46 @@ class HierarchicalAudioClassifier:
             'strategy': 'cascade'
         }
     
+    def train_flat_strategy(self, X, main_labels, sub_labels):
+        """Train flat strategy: one model over every main/sub pair"""
+        print("\n🔄 Training FLAT strategy...")
+        
+        # Tree models only need ordinal features; keep the design matrix as uint8
+        X = self._fit_quantizer(X)
+        
+        # Category names are directory names, so '/' cannot occur inside them
+        full_arr = np.char.add(np.char.add(np.asarray(main_labels), '/'), np.asarray(sub_labels))
+        full_le = _label_encoder(np.unique(full_arr))
+        y_full = _encode_labels(full_le, full_arr)
+        
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y_full, test_size=0.2, random_state=42, stratify=y_full
+        )
+        
+        self.main_model = self._new_model(len(X_train))
+        self.main_model.fit(X_train, y_train)
+        
+        # Evaluate on the full label and on the main category derived from it
+        pred = self.main_model.predict(X_test)
+        full_accuracy = accuracy_score(y_test, pred)
+        main_of = np.array([label.split('/', 1)[0] for label in full_le.classes_])
+        main_accuracy = accuracy_score(main_of[y_test], main_of[pred])
+        
+        print(f"   ✅ Main category accuracy: {main_accuracy:.1%}")
+        print(f"   ✅ Full (main/sub) accuracy: {full_accuracy:.1%}")
+        
+        self.strategy = 'flat'
+        self.sub_models = {}
+        self.scalers = {}
+        self._affine = {}
+        self.label_encoders = {'full': full_le}
+        
+        return {
+            'main_accuracy': main_accuracy,
+            'full_accuracy': full_accuracy,
+            'strategy': 'flat'
+        }
+    
     def predict_cascade(self, audio_file_path):
         """Predict using cascade strategy"""
         if self.main_model is None:
@@ -304,93 +517,210 @@ class HierarchicalAudioClassifier:
         if features is None:
             raise ValueError("Could not extract features from audio")
         
-        feature_array = features.reshape(1, -1)
-        
-        # 1. Predict main category
-        main_features_scaled = self.scalers['main'].transform(feature_array)
-        main_pred_encoded = self.main_model.predict(main_features_scaled)[0]
-        main_category = self.label_encoders['main'].inverse_transform([main_pred_encoded])[0]
-        
-        # Get main category confidence
-        main_probabilities = self.main_model.predict_proba(main_features_scaled)[0]
-        main_confidence = np.max(main_probabilities)
+        # Cast once; the scaling and model calls below reuse this float32 row as-is
+        feature_array = features.astype(np.float32, copy=False).reshape(1, -1)
+        return self._predict_rows(feature_array)[0]
+    
+    def predict_cascade_batch(self, audio_file_paths):
+        """Predict many files at once; returns one result per path (None if features failed)"""
+        if self.main_model is None:
+            raise ValueError("Models not trained. Call train() first.")
         
-        # 2. Predict subcategory if model exists
-        sub_category = None
-        sub_confidence = 0.0
-        sub_probabilities = {}
+        paths = [str(p) for p in audio_file_paths]
+        extracted = Parallel(n_jobs=-1, backend='loky')(
+            delayed(_extract_features)(p) for p in paths
+        )
+        return self.predict_features_batch(extracted)
+    
+    def predict_features_batch(self, extracted):
+        """Predict from already-extracted feature vectors; one result per entry (None where features are None)"""
+        if self.main_model is None:
+            raise ValueError("Models not trained. Call train() first.")
         
-        if main_category in self.sub_models:
-            sub_features_scaled = self.scalers[main_category].transform(feature_array)
-            sub_pred_encoded = self.sub_models[main_category].predict(sub_features_scaled)[0]
-            sub_category = self.label_encoders[main_category].inverse_transform([sub_pred_encoded])[0]
+        X = np.empty((len(extracted), FEATURE_DIM), dtype=np.float32)
+        ok = np.zeros(len(extracted), dtype=bool)
+        for i, features in enumerate(extracted):
+            if features is not None:
+                X[i] = features
+                ok[i] = True
+        
+        results = [None] * len(extracted)
+        rows = np.flatnonzero(ok)
+        if len(rows):
+            for row, result in zip(rows, self._predict_rows(X[rows])):
+                results[row] = result
+        return results
+    
+    @staticmethod
+    def _proba(model, X):
+        """predict_proba without spinning up a joblib thread pool for small batches"""
+        # Forests parallelise over trees; for a handful of rows the pool costs more than it saves
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = 1 if len(X) < 256 else -1
+        return model.predict_proba(X)
+    
+    def _predict_rows(self, X):
+        """Cascade prediction for an (N, F) feature matrix, one scaler/model call per stage"""
+        # Extracted features are always finite, so skip sklearn's per-call NaN/inf scan
+        with config_context(assume_finite=True):
+            X = self._quantize(X)
+            if self.strategy == 'flat':
+                return self._predict_rows_flat(X)
+            return self._predict_rows_cascade(X)
+    
+    def _predict_rows_cascade(self, X):
+        """Main model on every row, then each sub model on the rows routed to it"""
+        main_le = self.label_encoders['main']
+        
+        # 1. Predict main category - argmax over proba, mapped through the model's classes
+        main_probabilities = self._proba(self.main_model, self._transform('main', X))
+        main_best = main_probabilities.argmax(axis=1)
+        main_categories = main_le.inverse_transform(self.main_model.classes_[main_best])
+        
+        results = []
+        for i, main_category in enumerate(main_categories):
+            # Build main category probability breakdown
+            main_prob_breakdown = {}
+            for j, cat in enumerate(main_le.classes_):
+                main_prob_breakdown[cat] = float(main_probabilities[i, j])
             
-            # Get subcategory confidence
-            sub_probs = self.sub_models[main_category].predict_proba(sub_features_scaled)[0]
-            sub_confidence = np.max(sub_probs)
+            results.append({
+                'main_category': main_category,
+                'sub_category': None,
+                'full_prediction': main_category,
+                'main_confidence': float(main_probabilities[i, main_best[i]]),
+                'sub_confidence': 0.0,
+                'main_probabilities': main_prob_breakdown,
+                'sub_probabilities': {}
+            })
+        
+        # 2. Predict subcategories, one call per main category bucket
+        main_confidences = main_probabilities[np.arange(len(main_best)), main_best]
+        for main_category in np.unique(main_categories):
+            bucket = np.flatnonzero(main_categories == main_category)
             
-            # Build subcategory probability breakdown
-            for i, subcat in enumerate(self.label_encoders[main_category].classes_):
-                sub_probabilities[subcat] = float(sub_probs[i])
-        
-        # Build main category probability breakdown
-        main_prob_breakdown = {}
-        for i, cat in enumerate(self.label_encoders['main'].classes_):
-            main_prob_breakdown[cat] = float(main_probabilities[i])
+            # Only one subcategory - nothing to predict
+            subcats = self.category_structure.get(main_category, [])
+            if len(subcats) == 1:
+                for i in bucket:
+                    result = results[i]
+                    result['sub_category'] = subcats[0]
+                    result['full_prediction'] = f"{main_category}/{subcats[0]}"
+                    result['sub_confidence'] = 1.0
+                    result['sub_probabilities'] = {subcats[0]: 1.0}
+                continue
+            
+            if main_category not in self.sub_models:
+                continue
+            
+            # A weak main prediction makes the subcategory meaningless
+            bucket = bucket[main_confidences[bucket] >= self.min_sub_confidence_gate]
+            if len(bucket) == 0:
+                continue
+            
+            sub_model = self.sub_models[main_category]
+            sub_le = self.label_encoders[main_category]
+            
+            sub_probs = self._proba(sub_model, self._transform(main_category, X[bucket]))
+            sub_best = sub_probs.argmax(axis=1)
+            sub_categories = sub_le.inverse_transform(sub_model.classes_[sub_best])
+            
+            for k, i in enumerate(bucket):
+                sub_category = sub_categories[k]
+                result = results[i]
+                result['sub_category'] = sub_category
+                result['full_prediction'] = f"{main_category}/{sub_category}"
+                result['sub_confidence'] = float(sub_probs[k, sub_best[k]])
+                
+                # Build subcategory probability breakdown
+                for j, subcat in enumerate(sub_le.classes_):
+                    result['sub_probabilities'][subcat] = float(sub_probs[k, j])
         
-        return {
-            'main_category': main_category,
-            'sub_category': sub_category,
-            'full_prediction': f"{main_category}/{sub_category}" if sub_category else main_category,
-            'main_confidence': float(main_confidence),
-            'sub_confidence': float(sub_confidence),
-            'main_probabilities': main_prob_breakdown,
-            'sub_probabilities': sub_probabilities
-        }
+        return results
+    
+    def _predict_rows_flat(self, X):
+        """Flat-model prediction; main probabilities are sums over each main's columns"""
+        full_classes = self.label_encoders['full'].classes_[self.main_model.classes_]
+        probs = self._proba(self.main_model, np.asarray(X, dtype=np.float32))
+        
+        # Sorted "main/sub" labels keep each main category's columns contiguous
+        col_main = np.array([label.split('/', 1)[0] for label in full_classes])
+        col_sub = [label.split('/', 1)[1] for label in full_classes]
+        starts = np.flatnonzero(np.r_[True, col_main[1:] != col_main[:-1]])
+        main_classes = col_main[starts]
+        main_probs = np.add.reduceat(probs, starts, axis=1)
+        ends = np.r_[starts[1:], len(col_main)]
+        
+        results = []
+        for i in range(len(probs)):
+            m = int(main_probs[i].argmax())
+            main_category = main_classes[m]
+            main_confidence = float(main_probs[i, m])
+            
+            # Subcategory probabilities conditioned on the chosen main category
+            sub_probabilities = {}
+            for j in range(starts[m], ends[m]):
+                sub_probabilities[col_sub[j]] = float(probs[i, j] / main_confidence) if main_confidence > 0 else 0.0
+            sub_category = max(sub_probabilities, key=sub_probabilities.get)
+            
+            results.append({
+                'main_category': main_category,
+                'sub_category': sub_category,
+                'full_prediction': f"{main_category}/{sub_category}",
+                'main_confidence': main_confidence,
+                'sub_confidence': sub_probabilities[sub_category],
+                'main_probabilities': {cat: float(p) for cat, p in zip(main_classes, main_probs[i])},
+                'sub_probabilities': sub_probabilities
+            })
+        
+        return results
     
     def save_models(self, timestamp=None):
-        """Save all trained models"""
+        """Save all trained models into a single compressed archive"""
         if timestamp is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        model_data = {
+        archive = {
             'strategy': self.strategy,
             'category_structure': self.category_structure,
-            'timestamp': timestamp
+            'timestamp': timestamp,
+            'main_model': self.main_model,
+            'sub_models': self.sub_models,
+            'scalers': self.scalers,
+            'quantizer': self.quantizer,
+            'label_encoders': self.label_encoders
         }
-        
-        # Save main model
-        if self.main_model:
-            joblib.dump(self.main_model, f'hierarchical_main_model_{timestamp}.pkl')
-            model_data['main_model_file'] = f'hierarchical_main_model_{timestamp}.pkl'
-        
-        # Save sub models
-        for main_cat, sub_model in self.sub_models.items():
-            filename = f'hierarchical_sub_{main_cat}_model_{timestamp}.pkl'
-            joblib.dump(sub_model, filename)
-            model_data[f'sub_model_{main_cat}'] = filename
-        
-        # Save scalers
-        for name, scaler in self.scalers.items():
-            filename = f'hierarchical_scaler_{name}_{timestamp}.pkl'
-            joblib.dump(scaler, filename)
-            model_data[f'scaler_{name}'] = filename
-        
-        # Save label encoders
-        for name, le in self.label_encoders.items():
-            filename = f'hierarchical_le_{name}_{timestamp}.pkl'
-            joblib.dump(le, filename)
-            model_data[f'le_{name}'] = filename
-        
-        # Save model metadata
-        with open(f'hierarchical_models_info_{timestamp}.json', 'w') as f:
-            json.dump(model_data, f, indent=2)
+        joblib.dump(archive, f'hierarchical_models_{timestamp}.joblib', compress=MODEL_COMPRESS)
         
         print(f"💾 Hierarchical models saved with timestamp: {timestamp}")
         return timestamp
     
     def load_models(self, timestamp):
         """Load all trained models"""
+        archive_file = f'hierarchical_models_{timestamp}.joblib'
+        
+        if os.path.exists(archive_file):
+            archive = joblib.load(archive_file)
+            self.strategy = archive['strategy']
+            self.category_structure = archive['category_structure']
+            self.main_model = archive['main_model']
+            self.sub_models = archive['sub_models']
+            self.label_encoders = archive['label_encoders']
+            self.quantizer = archive.get('quantizer')
+            for name, scaler in archive['scalers'].items():
+                self._set_scaler(name, scaler)
+        else:
+            self._load_legacy_models(timestamp)
+        
+        _warm_up_kernels()
+        
+        print(f"✅ Hierarchical models loaded from timestamp: {timestamp}")
+        print(f"📊 Strategy: {self.strategy}")
+        print(f"🎯 Main categories: {list(self.category_structure.keys())}")
+        print(f"🔧 Sub models: {list(self.sub_models.keys())}")
+    
+    def _load_legacy_models(self, timestamp):
+        """Load models saved as one pkl per component plus a JSON index"""
         info_file = f'hierarchical_models_info_{timestamp}.json'
         
         if not os.path.exists(info_file):
@@ -413,23 +743,64 @@ class HierarchicalAudioClassifier:
                 self.sub_models[main_cat] = joblib.load(filename)
             elif key.startswith('scaler_'):
                 name = key.replace('scaler_', '')
-                self.scalers[name] = joblib.load(filename)
+                self._set_scaler(name, joblib.load(filename))
             elif key.startswith('le_'):
                 name = key.replace('le_', '')
                 self.label_encoders[name] = joblib.load(filename)
-        
-        print(f"✅ Hierarchical models loaded from timestamp: {timestamp}")
-        print(f"📊 Strategy: {self.strategy}")
-        print(f"🎯 Main categories: {list(self.category_structure.keys())}")
-        print(f"🔧 Sub models: {list(self.sub_models.keys())}")
 
-def main():
+def _extract_features(file_path, sr=22050, n_mfcc=13):
+    """Module-level extraction entry point (picklable for joblib workers)"""
+    return HierarchicalAudioClassifier.extract_enhanced_features(file_path, sr=sr, n_mfcc=n_mfcc)
+
+def _extract_features_keyed(file_path, mtime, size, sr, n_mfcc, feature_version):
+    """Extraction wrapped by the feature cache; every argument is part of the key"""
+    return _extract_features(file_path, sr=sr, n_mfcc=n_mfcc)
+
+def _extract_features_cached(cached_extract, file_path, sr=22050, n_mfcc=13):
+    """Extract features through cached_extract (a Memory-wrapped _extract_features_keyed)"""
+    try:
+        st = os.stat(file_path)
+    except OSError as e:
+        print(f"Error extracting features from {file_path}: {e}")
+        return None
+    return cached_extract(file_path, st.st_mtime, st.st_size, sr, n_mfcc, FEATURE_VERSION)
+
+def _fit_sub(X_sub, y_sub, seed, n_threads):
+    """Train one subcategory model; returns (model, label_encoder, accuracy)"""
+    # Encode subcategory labels once, before splitting
+    sub_le = _label_encoder(np.unique(y_sub))
+    y_sub_encoded = _encode_labels(sub_le, y_sub)
+    
+    # Split subcategory data
+    if len(X_sub) > 10:
+        X_sub_train, X_sub_test, y_sub_train_encoded, y_sub_test_encoded = train_test_split(
+            X_sub, y_sub_encoded, test_size=0.2, random_state=seed, stratify=y_sub_encoded
+        )
+    else:
+        # Use all data for training if very small dataset
+        X_sub_train, X_sub_test = X_sub, X_sub
+        y_sub_train_encoded, y_sub_test_encoded = y_sub_encoded, y_sub_encoded
+    
+    # Keep each worker's OpenMP pool to its share of the cores
+    with threadpool_limits(limits=n_threads):
+        sub_model = HierarchicalAudioClassifier._new_model(len(X_sub_train), max_iter=150)
+        sub_model.fit(X_sub_train, y_sub_train_encoded)
+        
+        # Evaluate subcategory model
+        sub_accuracy = None
+        if len(X_sub_test) > 0:
+            sub_pred = sub_model.predict(X_sub_test)
+            sub_accuracy = accuracy_score(y_sub_test_encoded, sub_pred)
+    
+    return sub_model, sub_le, sub_accuracy
+
+def main(strategy='cascade'):
     """Train hierarchical classifier"""
     print("🎵 HIERARCHICAL AUDIO CLASSIFICATION TRAINING")
     print("=" * 60)
     
     # Initialize classifier
-    classifier = HierarchicalAudioClassifier(strategy='cascade')
+    classifier = HierarchicalAudioClassifier(strategy=strategy)
     
     try:
         # Load hierarchical data
@@ -441,8 +812,11 @@ def main():
         print(f"   Main categories: {len(set(main_labels))}")
         print(f"   Total subcategories: {len(set(sub_labels))}")
         
-        # Train cascade strategy
-        results = classifier.train_cascade_strategy(X, main_labels, sub_labels)
+        # Train selected strategy
+        if classifier.strategy == 'flat':
+            results = classifier.train_flat_strategy(X, main_labels, sub_labels)
+        else:
+            results = classifier.train_cascade_strategy(X, main_labels, sub_labels)
         
         # Save models
         timestamp = classifier.save_models()
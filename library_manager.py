@@ -4,23 +4,289 @@ Selecta Library Manager - Enhanced music library management with metadata
 """
 
 import os
+import shutil
 import sqlite3
 import json
-from typing import Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
+_local = threading.local()
+
+# Concurrent file operations during export (bounded so the disk queue doesn't thrash)
+EXPORT_WORKERS = 16
+
+# Columns returned for a library file (shared by list and single-file lookups)
+FILE_COLUMNS = '''id, file_path, filename, file_size, main_category, sub_category, 
+                       main_confidence, sub_confidence, user_rating, user_tags, user_notes,
+                       bpm, key_signature, energy_level, last_played, play_count,
+                       duration_seconds, file_format, correction_count, user_verified,
+                       created_at, updated_at'''
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """Long-lived connection to db_path for the calling thread (opened once, then reused)"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row  # dict(row) builds result dicts in C
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+        ''')
+        connections[db_path] = conn
+    return conn
+
+def data_version(conn: sqlite3.Connection) -> Tuple[int, int, int]:
+    """Token that changes whenever the database is written, for caching query results"""
+    # data_version only moves for commits from other connections, so pair it with
+    # this connection's own total_changes to catch local writes as well
+    return (id(conn), conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+
+def split_tags(user_tags: Optional[str]) -> List[str]:
+    """Normalize a comma-separated user_tags string into distinct lowercase tags"""
+    if not user_tags:
+        return []
+    return sorted({tag.strip().lower() for tag in user_tags.split(',') if tag.strip()})
+
 class LibraryManager:
     """Enhanced library management with metadata, ratings, tags, and playlists"""
     
     def __init__(self, db_path: str = "selecta_library_enhanced.db"):
         self.db_path = db_path
         self.current_filter = {}
+        self._update_sql = {}  # field tuple -> UPDATE statement, so sqlite3 reuses the prepared statement
+        self._stats_cache = None
+        self._stats_version = None
+        self._similar_cache = {}  # file_id -> (data version, limit, results)
+        self.create_indexes()
+        self.has_stats_rollup = self.create_stats_rollup()
+        self.has_tags_table = self.create_tags_table()
+    
+    def create_indexes(self):
+        """Create indexes for the filter, sort and stats queries"""
+        conn = get_connection(self.db_path)
+        try:
+            # executescript runs in autocommit mode; one explicit transaction means one commit
+            conn.executescript('''
+                BEGIN IMMEDIATE;
+                CREATE INDEX IF NOT EXISTS idx_cat ON audio_files(main_category, sub_category, filename);
+                CREATE INDEX IF NOT EXISTS idx_filename ON audio_files(filename, id);
+                CREATE INDEX IF NOT EXISTS idx_rating ON audio_files(user_rating) WHERE user_rating > 0;
+                CREATE INDEX IF NOT EXISTS idx_verified ON audio_files(user_verified);
+                CREATE INDEX IF NOT EXISTS idx_tags ON audio_files(user_tags)
+                    WHERE user_tags IS NOT NULL AND user_tags != '';
+                COMMIT;
+            ''')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            # Tables are created by the scanner; nothing to index until they exist
+            print(f"Error creating indexes: {e}")
+        
+    def create_stats_rollup(self) -> bool:
+        """Create the library_stats rollup and the triggers that keep it in step with audio_files"""
+        def match(row, table='library_stats'):
+            # IS so that NULL categories/ratings group like any other value
+            return f'''{table}.main_category IS {row}.main_category AND {table}.sub_category IS {row}.sub_category
+                      AND {table}.user_rating IS {row}.user_rating AND {table}.user_verified IS {row}.user_verified
+                      AND {table}.has_tags = ({row}.user_tags IS NOT NULL AND {row}.user_tags != '')'''
         
+        add_new = f'''
+                INSERT INTO library_stats (main_category, sub_category, user_rating, user_verified,
+                                           has_tags, file_count, duration_sum)
+                SELECT NEW.main_category, NEW.sub_category, NEW.user_rating, NEW.user_verified,
+                       (NEW.user_tags IS NOT NULL AND NEW.user_tags != ''), 0, 0
+                WHERE NOT EXISTS (SELECT 1 FROM library_stats WHERE {match('NEW')});
+                UPDATE library_stats
+                SET file_count = file_count + 1, duration_sum = duration_sum + IFNULL(NEW.duration_seconds, 0)
+                WHERE {match('NEW')};'''
+        remove_old = f'''
+                UPDATE library_stats
+                SET file_count = file_count - 1, duration_sum = duration_sum - IFNULL(OLD.duration_seconds, 0)
+                WHERE {match('OLD')};
+                DELETE FROM library_stats WHERE file_count <= 0;'''
+        
+        conn = get_connection(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE name IN ('library_stats', 'trg_library_stats_replaced') AND type IN ('table', 'trigger')
+            """)
+            existing = {row[0] for row in cursor.fetchall()}
+            if 'trg_library_stats_replaced' in existing:
+                return True
+            
+            # Rollups kept by the older BEFORE INSERT adjustment may have drifted; rebuild them
+            rebuild = '''
+                    DROP TRIGGER IF EXISTS trg_library_stats_insert;
+                    DROP TRIGGER IF EXISTS trg_library_stats_replace;
+                    DROP TRIGGER IF EXISTS trg_library_stats_delete;
+                    DROP TRIGGER IF EXISTS trg_library_stats_update;
+                    DROP TABLE library_stats;''' if 'library_stats' in existing else ''
+            
+            conn.executescript(f'''
+                    BEGIN IMMEDIATE;{rebuild}
+                    CREATE TABLE library_stats (
+                        main_category TEXT,
+                        sub_category TEXT,
+                        user_rating INTEGER,
+                        user_verified BOOLEAN,
+                        has_tags BOOLEAN NOT NULL,
+                        file_count INTEGER NOT NULL,
+                        duration_sum REAL NOT NULL
+                    );
+                    CREATE INDEX idx_library_stats ON library_stats(main_category, sub_category, user_rating);
+                    
+                    INSERT INTO library_stats
+                    SELECT main_category, sub_category, user_rating, user_verified,
+                           (user_tags IS NOT NULL AND user_tags != '') AS has_tags,
+                           COUNT(*), IFNULL(SUM(duration_seconds), 0)
+                    FROM audio_files
+                    GROUP BY main_category, sub_category, user_rating, user_verified, has_tags;
+                    
+                    CREATE TRIGGER trg_library_stats_insert AFTER INSERT ON audio_files
+                    BEGIN {add_new}
+                    END;
+                    
+                    -- INSERT OR REPLACE removes the old row without firing DELETE triggers
+                    -- (recursive_triggers is off). BEFORE INSERT also fires for OR IGNORE and
+                    -- upserts, so it only stashes the existing row; AFTER INSERT runs only when
+                    -- the row really went in, i.e. the stashed row (if any) was replaced
+                    CREATE TABLE IF NOT EXISTS library_stats_replaced (
+                        main_category TEXT,
+                        sub_category TEXT,
+                        user_rating INTEGER,
+                        user_verified BOOLEAN,
+                        user_tags TEXT,
+                        duration_seconds REAL
+                    );
+                    DELETE FROM library_stats_replaced;
+                    
+                    CREATE TRIGGER trg_library_stats_stash BEFORE INSERT ON audio_files
+                    BEGIN
+                        DELETE FROM library_stats_replaced;
+                        INSERT INTO library_stats_replaced
+                        SELECT main_category, sub_category, user_rating, user_verified, user_tags, duration_seconds
+                        FROM audio_files WHERE file_path = NEW.file_path;
+                    END;
+                    
+                    CREATE TRIGGER trg_library_stats_replaced AFTER INSERT ON audio_files
+                    WHEN EXISTS (SELECT 1 FROM library_stats_replaced)
+                    BEGIN
+                        UPDATE library_stats
+                        SET file_count = file_count - 1,
+                            duration_sum = duration_sum - IFNULL(
+                                (SELECT duration_seconds FROM library_stats_replaced), 0)
+                        WHERE rowid = (
+                            SELECT s.rowid FROM library_stats s, library_stats_replaced r
+                            WHERE {match('r', 's')});
+                        DELETE FROM library_stats WHERE file_count <= 0;
+                        DELETE FROM library_stats_replaced;
+                    END;
+                    
+                    CREATE TRIGGER trg_library_stats_delete AFTER DELETE ON audio_files
+                    BEGIN {remove_old}
+                    END;
+                    
+                    CREATE TRIGGER trg_library_stats_update
+                    AFTER UPDATE OF main_category, sub_category, user_rating, user_verified, user_tags, duration_seconds
+                    ON audio_files
+                    BEGIN {remove_old} {add_new}
+                    END;
+                    COMMIT;
+                ''')
+            return True
+            
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error creating stats rollup: {e}")
+            return False
+    
+    def create_tags_table(self) -> bool:
+        """Create the normalized tags table (one row per file/tag) and backfill it from user_tags"""
+        conn = get_connection(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE name IN ('tags', 'trg_tags_replaced') AND type IN ('table', 'trigger')
+            """)
+            existing = {row[0] for row in cursor.fetchall()}
+            if 'trg_tags_replaced' in existing:
+                return True
+            
+            cursor.execute("SELECT id, user_tags FROM audio_files WHERE user_tags IS NOT NULL AND user_tags != ''")
+            rows = [(file_id, tag) for file_id, user_tags in cursor.fetchall() for tag in split_tags(user_tags)]
+            
+            # sqlite3 leaves DDL in autocommit, so begin explicitly: table, triggers and backfill in one commit
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                if 'tags' not in existing:
+                    cursor.execute('''
+                        CREATE TABLE tags (
+                            file_id INTEGER NOT NULL,
+                            tag TEXT COLLATE NOCASE NOT NULL,
+                            PRIMARY KEY (file_id, tag)
+                        )
+                    ''')
+                    cursor.execute("CREATE INDEX idx_tag ON tags(tag, file_id)")
+                    cursor.execute('''
+                        CREATE TRIGGER trg_tags_delete AFTER DELETE ON audio_files
+                        BEGIN
+                            DELETE FROM tags WHERE file_id = OLD.id;
+                        END
+                    ''')
+                else:
+                    # Tables kept by the older triggers may hold rows of replaced files or have lost
+                    # tags to an OR IGNORE/upsert, so rebuild them from user_tags
+                    cursor.execute("DROP TRIGGER IF EXISTS trg_tags_replace")
+                    cursor.execute("DELETE FROM tags")
+                cursor.executemany("INSERT OR IGNORE INTO tags (file_id, tag) VALUES (?, ?)", rows)
+                
+                # INSERT OR REPLACE removes the old row without firing DELETE triggers
+                # (recursive_triggers is off) and the new row gets a new id. BEFORE INSERT also
+                # fires for OR IGNORE and upserts, so it only stashes the existing id; its tags
+                # go in AFTER INSERT, which runs only when the row really was replaced
+                cursor.execute("CREATE TABLE IF NOT EXISTS tags_replaced (file_id INTEGER)")
+                cursor.execute("DELETE FROM tags_replaced")
+                cursor.execute('''
+                    CREATE TRIGGER trg_tags_stash BEFORE INSERT ON audio_files
+                    BEGIN
+                        DELETE FROM tags_replaced;
+                        INSERT INTO tags_replaced SELECT id FROM audio_files WHERE file_path = NEW.file_path;
+                    END
+                ''')
+                cursor.execute('''
+                    CREATE TRIGGER trg_tags_replaced AFTER INSERT ON audio_files
+                    WHEN EXISTS (SELECT 1 FROM tags_replaced)
+                    BEGIN
+                        DELETE FROM tags WHERE file_id IN (SELECT file_id FROM tags_replaced);
+                        DELETE FROM tags_replaced;
+                    END
+                ''')
+            return True
+                
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Error creating tags table: {e}")
+            return False
+    
     def update_metadata(self, file_id: int, **metadata) -> bool:
         """Update metadata for a file"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
             # Build dynamic update query
@@ -30,16 +296,33 @@ class LibraryManager:
             for field, value in metadata.items():
                 if field in ['user_rating', 'user_tags', 'user_notes', 'bpm', 
                            'key_signature', 'energy_level', 'duration_seconds']:
-                    update_fields.append(f"{field} = ?")
+                    update_fields.append(field)
                     values.append(value)
             
             if update_fields:
                 values.append(file_id)
-                query = f"UPDATE audio_files SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
-                cursor.execute(query, values)
-                conn.commit()
+                key = tuple(update_fields)
+                query = self._update_sql.get(key)
+                if query is None:
+                    assignments = ', '.join(f"{field} = ?" for field in update_fields)
+                    query = f"UPDATE audio_files SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+                    self._update_sql[key] = query
+                # Retry the tags table if it failed at startup; without it only user_tags is saved
+                if 'user_tags' in metadata and not self.has_tags_table:
+                    self.has_tags_table = self.create_tags_table()
+                sync_tags = 'user_tags' in metadata and self.has_tags_table
+                with conn:
+                    cursor.execute(query, values)
+                    
+                    # Keep the normalized tags in step with user_tags
+                    if sync_tags:
+                        cursor.execute("DELETE FROM tags WHERE file_id = ?", (file_id,))
+                        cursor.executemany(
+                            "INSERT OR IGNORE INTO tags (file_id, tag) VALUES (?, ?)",
+                            [(file_id, tag) for tag in split_tags(metadata['user_tags'])]
+                        )
+                self._similar_cache.pop(file_id, None)
             
-            conn.close()
             return True
             
         except Exception as e:
@@ -47,19 +330,32 @@ class LibraryManager:
             return False
     
     def get_library_with_metadata(self, filters: Dict = None, search_term: str = None, 
-                                 limit: int = None, offset: int = 0) -> List[Dict]:
-        """Get library files with metadata and optional filtering"""
+                                 limit: int = None, offset: int = 0,
+                                 after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """Get library files with metadata and optional filtering
+        
+        Pass the (filename, id) of the last row seen as `after` for keyset
+        pagination; it replaces OFFSET and stays cheap at any page depth.
+        """
+        return list(self.iter_library_with_metadata(filters, search_term, limit, offset, after))
+    
+    def iter_library_with_metadata(self, filters: Dict = None, search_term: str = None,
+                                   limit: int = None, offset: int = 0,
+                                   after: Optional[Tuple[str, int]] = None,
+                                   rows: bool = False) -> Iterator[Dict]:
+        """Stream library files in fetchmany batches (same arguments as get_library_with_metadata)
+        
+        With rows=True the sqlite3.Row objects are yielded as-is: read-only, indexable by
+        column name, and sharing one column description instead of a dict per file.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
+            cursor.arraysize = 1000
             
             # Base query
-            query = '''
-                SELECT id, file_path, filename, file_size, main_category, sub_category, 
-                       main_confidence, sub_confidence, user_rating, user_tags, user_notes,
-                       bpm, key_signature, energy_level, last_played, play_count,
-                       duration_seconds, file_format, correction_count, user_verified,
-                       created_at, updated_at
+            query = f'''
+                SELECT {FILE_COLUMNS}
                 FROM audio_files
                 WHERE 1=1
             '''
@@ -92,73 +388,61 @@ class LibraryManager:
                 search_pattern = f"%{search_term}%"
                 params.extend([search_pattern, search_pattern, search_pattern])
             
-            # Add ordering
-            query += " ORDER BY filename"
+            # Keyset pagination: continue after the last (filename, id) seen
+            if after is not None:
+                query += " AND (filename, id) > (?, ?)"
+                params.extend(after)
+            
+            # Add ordering (id breaks ties between same-named files)
+            query += " ORDER BY filename, id"
             
-            # Add pagination
+            # Add pagination - bound parameters so the statement is cached once
             if limit:
-                query += f" LIMIT {limit} OFFSET {offset}"
+                query += " LIMIT ? OFFSET ?"
+                params.extend([limit, 0 if after is not None else offset])
             
             cursor.execute(query, params)
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'id': row[0],
-                    'file_path': row[1],
-                    'filename': row[2],
-                    'file_size': row[3],
-                    'main_category': row[4],
-                    'sub_category': row[5],
-                    'main_confidence': row[6],
-                    'sub_confidence': row[7],
-                    'user_rating': row[8],
-                    'user_tags': row[9],
-                    'user_notes': row[10],
-                    'bpm': row[11],
-                    'key_signature': row[12],
-                    'energy_level': row[13],
-                    'last_played': row[14],
-                    'play_count': row[15],
-                    'duration_seconds': row[16],
-                    'file_format': row[17],
-                    'correction_count': row[18],
-                    'user_verified': row[19],
-                    'created_at': row[20],
-                    'updated_at': row[21]
-                })
-            
-            conn.close()
-            return results
+            while True:
+                chunk = cursor.fetchmany()
+                if not chunk:
+                    break
+                if rows:
+                    yield from chunk
+                else:
+                    yield from (dict(row) for row in chunk)
             
         except Exception as e:
             print(f"Error getting library: {e}")
-            return []
     
     def get_file_by_id(self, file_id: int) -> Optional[Dict]:
         """Get a single file by ID"""
-        files = self.get_library_with_metadata()
-        for file in files:
-            if file['id'] == file_id:
-                return file
-        return None
+        try:
+            cursor = get_connection(self.db_path).cursor()
+            cursor.execute(f"SELECT {FILE_COLUMNS} FROM audio_files WHERE id = ?", (file_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+            
+        except Exception as e:
+            print(f"Error getting file {file_id}: {e}")
+            return None
     
     def update_play_stats(self, file_id: int):
         """Update play count and last played timestamp"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('''
-                UPDATE audio_files 
-                SET play_count = play_count + 1, 
-                    last_played = CURRENT_TIMESTAMP,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (file_id,))
+            with conn:
+                cursor.execute('''
+                    UPDATE audio_files 
+                    SET play_count = play_count + 1, 
+                        last_played = CURRENT_TIMESTAMP,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (file_id,))
+            self._similar_cache.pop(file_id, None)
             
-            conn.commit()
-            conn.close()
             return True
             
         except Exception as e:
@@ -168,81 +452,88 @@ class LibraryManager:
     def get_library_stats(self) -> Dict:
         """Get comprehensive library statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
+            version = data_version(conn)
+            if version == self._stats_version:
+                return self._stats_cache
+            
+            # Read the rollup; without it, view audio_files in the same shape (one row per file)
+            if self.has_stats_rollup:
+                source = "library_stats"
+            else:
+                source = '''(SELECT main_category, user_rating, user_verified,
+                                   (user_tags IS NOT NULL AND user_tags != '') AS has_tags,
+                                   1 AS file_count, IFNULL(duration_seconds, 0) AS duration_sum
+                            FROM audio_files)'''
+            
             stats = {}
             
-            # Basic counts
-            cursor.execute("SELECT COUNT(*) FROM audio_files")
-            stats['total_files'] = cursor.fetchone()[0]
+            # Counts, playtime and average rating in a single pass
+            cursor.execute(f'''
+                SELECT IFNULL(SUM(file_count), 0),
+                       IFNULL(SUM(CASE WHEN user_verified = 1 THEN file_count END), 0),
+                       IFNULL(SUM(CASE WHEN user_verified = 0 THEN file_count END), 0),
+                       IFNULL(SUM(CASE WHEN has_tags THEN file_count END), 0),
+                       IFNULL(SUM(duration_sum), 0),
+                       SUM(CASE WHEN user_rating > 0 THEN user_rating * file_count END) * 1.0 /
+                           SUM(CASE WHEN user_rating > 0 THEN file_count END)
+                FROM {source}
+            ''')
+            total, verified, unverified, tagged, total_seconds, average_rating = cursor.fetchone()
+            stats['total_files'] = total
+            stats['verified_count'] = verified
+            stats['unverified_count'] = unverified
+            stats['tagged_files'] = tagged
+            stats['total_duration_hours'] = total_seconds / 3600
+            stats['average_rating'] = average_rating or 0
             
             # Category breakdown
-            cursor.execute('''
-                SELECT main_category, COUNT(*) 
-                FROM audio_files 
+            cursor.execute(f'''
+                SELECT main_category, SUM(file_count) 
+                FROM {source} 
                 WHERE main_category IS NOT NULL
                 GROUP BY main_category
             ''')
             stats['main_categories'] = dict(cursor.fetchall())
             
             # Rating distribution
-            cursor.execute('''
-                SELECT user_rating, COUNT(*) 
-                FROM audio_files 
+            cursor.execute(f'''
+                SELECT user_rating, SUM(file_count) 
+                FROM {source} 
                 WHERE user_rating > 0
                 GROUP BY user_rating
             ''')
             stats['rating_distribution'] = dict(cursor.fetchall())
             
-            # Verified vs unverified
-            cursor.execute("SELECT user_verified, COUNT(*) FROM audio_files GROUP BY user_verified")
-            verification_data = dict(cursor.fetchall())
-            stats['verified_count'] = verification_data.get(True, 0)
-            stats['unverified_count'] = verification_data.get(False, 0)
-            
-            # Files with tags
-            cursor.execute("SELECT COUNT(*) FROM audio_files WHERE user_tags IS NOT NULL AND user_tags != ''")
-            stats['tagged_files'] = cursor.fetchone()[0]
-            
-            # Total playtime
-            cursor.execute("SELECT SUM(duration_seconds) FROM audio_files WHERE duration_seconds IS NOT NULL")
-            total_seconds = cursor.fetchone()[0] or 0
-            stats['total_duration_hours'] = total_seconds / 3600
-            
-            # Average rating
-            cursor.execute("SELECT AVG(user_rating) FROM audio_files WHERE user_rating > 0")
-            stats['average_rating'] = cursor.fetchone()[0] or 0
-            
-            conn.close()
+            self._stats_cache = stats
+            self._stats_version = version
             return stats
             
         except Exception as e:
             print(f"Error getting library stats: {e}")
             return {}
     
-    def search_tags(self, tag_query: str) -> List[str]:
-        """Search for existing tags (for autocomplete)"""
+    def search_tags(self, tag_query: str, limit: int = 50) -> List[str]:
+        """Search for existing tags by prefix (for autocomplete)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
+            # Prefix LIKE on the NOCASE tag column is an index range scan; the audio_files
+            # check (a primary-key lookup) skips rows whose file no longer exists
+            pattern = tag_query.strip().lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
             cursor.execute('''
-                SELECT DISTINCT user_tags 
-                FROM audio_files 
-                WHERE user_tags IS NOT NULL AND user_tags != '' AND user_tags LIKE ?
-            ''', (f"%{tag_query}%",))
-            
-            all_tags = set()
-            for row in cursor.fetchall():
-                tags = row[0].split(',')
-                for tag in tags:
-                    tag = tag.strip().lower()
-                    if tag_query.lower() in tag:
-                        all_tags.add(tag)
-            
-            conn.close()
-            return sorted(list(all_tags))
+                SELECT DISTINCT tag
+                FROM tags
+                WHERE tag LIKE ? ESCAPE '\\'
+                  AND EXISTS (SELECT 1 FROM audio_files WHERE id = tags.file_id)
+                ORDER BY tag
+                LIMIT ?
+            ''', (pattern, limit))
+            
+            return [row[0] for row in cursor.fetchall()]
             
         except Exception as e:
             print(f"Error searching tags: {e}")
@@ -250,62 +541,57 @@ class LibraryManager:
     
     def get_similar_files(self, file_id: int, limit: int = 10) -> List[Dict]:
         """Find similar files based on category, tags, and rating"""
-        file_data = self.get_file_by_id(file_id)
-        if not file_data:
-            return []
-        
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
-            # Find files with similar attributes
+            version = data_version(conn)
+            cached = self._similar_cache.get(file_id)
+            if cached and cached[0] == version and cached[1] == limit:
+                return [dict(row) for row in cached[2]]
+            
+            # Reference file, shared tags and scoring in one statement
             query = '''
-                SELECT id, filename, main_category, sub_category, user_rating, user_tags,
-                       main_confidence, sub_confidence
-                FROM audio_files 
-                WHERE id != ? AND (
-                    (main_category = ? AND sub_category = ?) OR
-                    (user_rating = ? AND user_rating > 0) OR
-                    (user_tags LIKE ? AND user_tags IS NOT NULL)
+                WITH me AS (
+                    SELECT id, main_category, sub_category, user_rating
+                    FROM audio_files
+                    WHERE id = ?
+                ),
+                shared AS (
+                    SELECT DISTINCT other.file_id
+                    FROM tags mine
+                    JOIN tags other ON other.tag = mine.tag
+                    WHERE mine.file_id = ?
+                ),
+                -- Each branch is an index seek (idx_cat, idx_rating, idx_tag) carrying its own score
+                candidates AS (
+                    SELECT af.id, 3 AS score FROM me
+                    JOIN audio_files af ON af.main_category = me.main_category AND af.sub_category = me.sub_category
+                    UNION ALL
+                    SELECT af.id, 2 AS score FROM me
+                    JOIN audio_files af ON af.user_rating = me.user_rating AND af.user_rating > 0
+                    UNION ALL
+                    SELECT file_id, 1 AS score FROM shared
                 )
-                ORDER BY 
-                    CASE WHEN main_category = ? AND sub_category = ? THEN 3 ELSE 0 END +
-                    CASE WHEN user_rating = ? THEN 2 ELSE 0 END +
-                    CASE WHEN user_tags LIKE ? THEN 1 ELSE 0 END DESC,
-                    main_confidence DESC
+                SELECT af.id, af.filename, af.main_category, af.sub_category, af.user_rating, af.user_tags,
+                       af.main_confidence, af.sub_confidence
+                FROM (
+                    SELECT id, SUM(score) AS score
+                    FROM candidates
+                    WHERE id != ?
+                    GROUP BY id
+                ) c
+                JOIN audio_files af ON af.id = c.id
+                ORDER BY c.score DESC, af.main_confidence DESC
                 LIMIT ?
             '''
             
-            tag_pattern = f"%{file_data.get('user_tags', '')}%" if file_data.get('user_tags') else "%"
-            
-            cursor.execute(query, (
-                file_id,
-                file_data['main_category'],
-                file_data['sub_category'],
-                file_data['user_rating'],
-                tag_pattern,
-                file_data['main_category'],
-                file_data['sub_category'],
-                file_data['user_rating'],
-                tag_pattern,
-                limit
-            ))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'id': row[0],
-                    'filename': row[1],
-                    'main_category': row[2],
-                    'sub_category': row[3],
-                    'user_rating': row[4],
-                    'user_tags': row[5],
-                    'main_confidence': row[6],
-                    'sub_confidence': row[7]
-                })
-            
-            conn.close()
-            return results
+            cursor.execute(query, (file_id, file_id, file_id, limit))
+            
+            results = [dict(row) for row in cursor.fetchall()]
+            self._similar_cache[file_id] = (version, limit, results)
+            
+            return [dict(row) for row in results]
             
         except Exception as e:
             print(f"Error finding similar files: {e}")
@@ -320,19 +606,16 @@ class PlaylistManager:
     def create_playlist(self, name: str, description: str = "") -> int:
         """Create a new playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO playlists (name, description)
-                VALUES (?, ?)
-            ''', (name, description))
-            
-            playlist_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor.execute('''
+                    INSERT INTO playlists (name, description)
+                    VALUES (?, ?)
+                ''', (name, description))
             
-            return playlist_id
+            return cursor.lastrowid
             
         except Exception as e:
             print(f"Error creating playlist: {e}")
@@ -341,7 +624,7 @@ class PlaylistManager:
     def get_playlists(self) -> List[Dict]:
         """Get all playlists"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -353,17 +636,8 @@ class PlaylistManager:
                 ORDER BY p.name
             ''')
             
-            playlists = []
-            for row in cursor.fetchall():
-                playlists.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3],
-                    'track_count': row[4]
-                })
-            
-            conn.close()
+            playlists = [dict(row) for row in cursor.fetchall()]
+            
             return playlists
             
         except Exception as e:
@@ -372,27 +646,30 @@ class PlaylistManager:
     
     def add_to_playlist(self, playlist_id: int, file_id: int) -> bool:
         """Add a file to a playlist"""
+        return self.add_many_to_playlist(playlist_id, [file_id])
+    
+    def add_many_to_playlist(self, playlist_id: int, file_ids: List[int]) -> bool:
+        """Append several files to a playlist in one transaction"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
-            # Get next position
-            cursor.execute('''
-                SELECT COALESCE(MAX(position), 0) + 1 
-                FROM playlist_tracks 
-                WHERE playlist_id = ?
-            ''', (playlist_id,))
-            
-            position = cursor.fetchone()[0]
-            
-            # Add track
-            cursor.execute('''
-                INSERT INTO playlist_tracks (playlist_id, file_id, position)
-                VALUES (?, ?, ?)
-            ''', (playlist_id, file_id, position))
+            with conn:
+                # Get next position once for the whole batch
+                cursor.execute('''
+                    SELECT COALESCE(MAX(position), 0) + 1 
+                    FROM playlist_tracks 
+                    WHERE playlist_id = ?
+                ''', (playlist_id,))
+                
+                base = cursor.fetchone()[0]
+                
+                # Add tracks
+                cursor.executemany('''
+                    INSERT INTO playlist_tracks (playlist_id, file_id, position)
+                    VALUES (?, ?, ?)
+                ''', [(playlist_id, file_id, base + i) for i, file_id in enumerate(file_ids)])
             
-            conn.commit()
-            conn.close()
             return True
             
         except Exception as e:
@@ -402,11 +679,11 @@ class PlaylistManager:
     def get_playlist_tracks(self, playlist_id: int) -> List[Dict]:
         """Get tracks in a playlist"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT af.id, af.filename, af.main_category, af.sub_category,
+                SELECT af.id AS file_id, af.filename, af.main_category, af.sub_category,
                        af.user_rating, af.duration_seconds, pt.position
                 FROM playlist_tracks pt
                 JOIN audio_files af ON pt.file_id = af.id
@@ -414,25 +691,49 @@ class PlaylistManager:
                 ORDER BY pt.position
             ''', (playlist_id,))
             
-            tracks = []
-            for row in cursor.fetchall():
-                tracks.append({
-                    'file_id': row[0],
-                    'filename': row[1],
-                    'main_category': row[2],
-                    'sub_category': row[3],
-                    'user_rating': row[4],
-                    'duration_seconds': row[5],
-                    'position': row[6]
-                })
-            
-            conn.close()
+            tracks = [dict(row) for row in cursor.fetchall()]
+            
             return tracks
             
         except Exception as e:
             print(f"Error getting playlist tracks: {e}")
             return []
 
+    def get_playlist(self, playlist_id: int) -> Optional[Dict]:
+        """Get a single playlist's details"""
+        try:
+            cursor = get_connection(self.db_path).cursor()
+            cursor.execute('''
+                SELECT id, name, description, created_at
+                FROM playlists
+                WHERE id = ?
+            ''', (playlist_id,))
+            
+            row = cursor.fetchone()
+            return dict(row) if row else None
+            
+        except Exception as e:
+            print(f"Error getting playlist: {e}")
+            return None
+    
+    def get_playlist_tracks_full(self, playlist_id: int) -> List[sqlite3.Row]:
+        """Get tracks in a playlist with file path and duration (for export, as read-only rows)"""
+        try:
+            cursor = get_connection(self.db_path).cursor()
+            cursor.execute('''
+                SELECT af.file_path, af.filename, af.duration_seconds, pt.position
+                FROM playlist_tracks pt
+                JOIN audio_files af ON pt.file_id = af.id
+                WHERE pt.playlist_id = ?
+                ORDER BY pt.position
+            ''', (playlist_id,))
+            
+            return cursor.fetchall()
+            
+        except Exception as e:
+            print(f"Error getting playlist tracks: {e}")
+            return []
+
 class ExportManager:
     """Export system for organized directories and playlists"""
     
@@ -446,8 +747,8 @@ class ExportManager:
             destination_path = Path(destination)
             destination_path.mkdir(parents=True, exist_ok=True)
             
-            # Get filtered files
-            files = self.library_manager.get_library_with_metadata(filters)
+            # Get filtered files (rows are only read, so skip the per-file dicts)
+            files = list(self.library_manager.iter_library_with_metadata(filters, rows=True))
             
             export_stats = {
                 'total_files': len(files),
@@ -456,38 +757,58 @@ class ExportManager:
                 'errors': []
             }
             
-            for file_data in files:
-                try:
-                    source_path = Path(file_data['file_path'])
-                    
-                    # Create category structure
-                    category_dir = destination_path / file_data['main_category']
-                    if file_data['sub_category']:
-                        category_dir = category_dir / file_data['sub_category']
-                    
-                    category_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    # Destination file path
-                    dest_file_path = category_dir / file_data['filename']
-                    
-                    # Copy or link file
-                    if copy_files and source_path.exists():
-                        if not dest_file_path.exists():
-                            import shutil
-                            shutil.copy2(source_path, dest_file_path)
-                            export_stats['copied_files'] += 1
-                        else:
-                            export_stats['skipped_files'] += 1
-                    
-                    elif create_symlinks and source_path.exists():
-                        if not dest_file_path.exists():
-                            dest_file_path.symlink_to(source_path)
-                            export_stats['copied_files'] += 1
-                        else:
-                            export_stats['skipped_files'] += 1
-                            
-                except Exception as e:
-                    export_stats['errors'].append(f"Error with {file_data['filename']}: {e}")
+            # Source-directory order keeps reads local; copies run on an I/O thread pool
+            files = sorted(files, key=lambda f: f['file_path'])
+            existing = {}  # destination dir -> names already present (one scandir per dir)
+            copies = {}  # future -> file_data
+            
+            # Only this thread touches the database; workers just copy files
+            with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+                for file_data in files:
+                    try:
+                        source_path = Path(file_data['file_path'])
+                        
+                        # Create category structure
+                        category_dir = destination_path / file_data['main_category']
+                        if file_data['sub_category']:
+                            category_dir = category_dir / file_data['sub_category']
+                        
+                        if category_dir not in existing:
+                            category_dir.mkdir(parents=True, exist_ok=True)
+                            existing[category_dir] = {entry.name for entry in os.scandir(category_dir)}
+                        names = existing[category_dir]
+                        
+                        # Destination file path
+                        dest_file_path = category_dir / file_data['filename']
+                        
+                        # Copy or link file
+                        if copy_files:
+                            if file_data['filename'] not in names:
+                                names.add(file_data['filename'])
+                                copies[pool.submit(shutil.copy2, source_path, dest_file_path)] = file_data
+                            elif source_path.exists():
+                                export_stats['skipped_files'] += 1
+                        
+                        elif create_symlinks and source_path.exists():
+                            if file_data['filename'] not in names:
+                                dest_file_path.symlink_to(source_path)
+                                names.add(file_data['filename'])
+                                export_stats['copied_files'] += 1
+                            else:
+                                export_stats['skipped_files'] += 1
+                                
+                    except Exception as e:
+                        export_stats['errors'].append(f"Error with {file_data['filename']}: {e}")
+                
+                for future in as_completed(copies):
+                    file_data = copies[future]
+                    try:
+                        future.result()
+                        export_stats['copied_files'] += 1
+                    except FileNotFoundError:
+                        pass  # source no longer on disk
+                    except Exception as e:
+                        export_stats['errors'].append(f"Error with {file_data['filename']}: {e}")
             
             # Create metadata file
             metadata_file = destination_path / "selecta_export_info.json"
@@ -509,25 +830,27 @@ class ExportManager:
     def export_playlist_m3u(self, playlist_id: int, destination: str, playlist_manager: PlaylistManager) -> bool:
         """Export playlist as M3U file"""
         try:
-            tracks = playlist_manager.get_playlist_tracks(playlist_id)
-            playlist_info = next((p for p in playlist_manager.get_playlists() if p['id'] == playlist_id), None)
+            playlist_info = playlist_manager.get_playlist(playlist_id)
             
             if not playlist_info:
                 return False
             
+            tracks = playlist_manager.get_playlist_tracks_full(playlist_id)
+            
             m3u_path = Path(destination) / f"{playlist_info['name']}.m3u"
             
+            # Check the tracks on disk concurrently (slow on network/external drives)
+            with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+                present = list(pool.map(os.path.exists, [track['file_path'] for track in tracks]))
+            
+            lines = ["#EXTM3U\n", f"#PLAYLIST:{playlist_info['name']}\n\n"]
+            for track, exists in zip(tracks, present):
+                if exists:
+                    duration = int(track['duration_seconds'] or 0)
+                    lines.append(f"#EXTINF:{duration},{track['filename']}\n{track['file_path']}\n")
+            
             with open(m3u_path, 'w', encoding='utf-8') as f:
-                f.write("#EXTM3U\n")
-                f.write(f"#PLAYLIST:{playlist_info['name']}\n\n")
-                
-                for track in tracks:
-                    # Get full file data
-                    file_data = self.library_manager.get_file_by_id(track['file_id'])
-                    if file_data and os.path.exists(file_data['file_path']):
-                        duration = int(file_data.get('duration_seconds', 0))
-                        f.write(f"#EXTINF:{duration},{track['filename']}\n")
-                        f.write(f"{file_data['file_path']}\n")
+                f.writelines(lines)
             
             return True
             
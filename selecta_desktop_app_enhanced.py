@@ -7,13 +7,19 @@ GUI application with user feedback and active learning capabilities
 import os
 import sys
 import json
+import hashlib
+import string
 import sqlite3
+import atexit
 from pathlib import Path
 from datetime import datetime
 import threading
 import queue
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Optional, Tuple
 import shutil
+import subprocess
+import pandas as pd
 
 # GUI imports
 try:
@@ -28,16 +34,149 @@ from hierarchical_classifier import HierarchicalAudioClassifier
 import warnings
 warnings.filterwarnings('ignore')
 
+_local = threading.local()
+_open_connections = []
+
+# Scan results written per transaction
+SAVE_BATCH_SIZE = 500
+
+# Files per classifier call during a scan
+CLASSIFY_BATCH_SIZE = 32
+
+# Bytes hashed from each end of a file for its content key
+CONTENT_KEY_BYTES = 65536
+
+# Content-cache rows kept when a model is loaded (most recently saved first)
+CLASSIFICATION_CACHE_MAX_ROWS = 200000
+
+# Audio file extensions picked up by a scan
+SUPPORTED_FORMATS = frozenset({'.wav', '.mp3', '.flac', '.m4a', '.aiff', '.ogg'})
+
+# Files found between directory-scan progress messages
+PROGRESS_EVERY = 1000
+
+# Rows moved per mouse-wheel notch in the results view
+WHEEL_ROWS = 3
+
+# Scan queue messages applied per UI update, and the fallback poll interval
+# (updates normally arrive through <<ScanUpdate>> events)
+QUEUE_DRAIN_MAX = 500
+QUEUE_POLL_MS = 500
+
+# Ids bound per "WHERE id IN (...)" statement
+SQL_IN_CHUNK = 900
+
+# Scan result upserts, kept as single strings so every batch hits the statement cache
+SAVE_AUDIO_FILE_SQL = '''
+    INSERT OR REPLACE INTO audio_files 
+    (file_path, filename, file_size, main_category, sub_category, 
+     main_confidence, sub_confidence, model_version, updated_at, user_verified)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, FALSE)
+'''
+SAVE_PROBABILITIES_SQL = '''
+    INSERT OR REPLACE INTO audio_file_probabilities 
+    (file_path, main_probabilities, sub_probabilities)
+    VALUES (?, ?, ?)
+'''
+SAVE_CLASSIFICATION_CACHE_SQL = '''
+    INSERT OR REPLACE INTO classification_cache 
+    (content_key, main_category, sub_category, main_confidence, sub_confidence,
+     model_version, main_probabilities, sub_probabilities, saved_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
+# DirEntry.stat() is answered from the directory listing only on Windows;
+# elsewhere it is a syscall best left to the classify workers
+_SCANDIR_HAS_STAT = os.name == 'nt'
+
+# Characters allowed in a subcategory name
+_NAME_ALLOWED = frozenset(string.ascii_lowercase + string.digits + '_')
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Long-lived autocommit connection to db_path for the calling thread, with WAL and tuned pragmas"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    conn = connections.get(db_path)
+    if conn is None:
+        # check_same_thread=False only so the exit hook can close every thread's connection
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+            PRAGMA busy_timeout=5000;
+        ''')
+        connections[db_path] = conn
+        _open_connections.append(conn)
+    return conn
+
+def _analyze_once(conn: sqlite3.Connection):
+    """Gather planner statistics the first time; PRAGMA optimize keeps them fresh after that"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("ANALYZE")
+
+def _create_without_rowid(conn: sqlite3.Connection, table: str, create_sql: str, columns: List[str]):
+    """Create table from create_sql, rebuilding an older rowid version of it once (copying columns)"""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if row and 'WITHOUT ROWID' in row[0].upper():
+        return
+    
+    column_list = ', '.join(columns)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if row:
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        conn.execute(create_sql)
+        if row:
+            # Rows the new primary key rejects (duplicates, NULL keys) are dropped
+            conn.execute(f"INSERT OR IGNORE INTO {table} ({column_list}) SELECT {column_list} FROM {table}_old")
+            conn.execute(f"DROP TABLE {table}_old")
+
+@atexit.register
+def _close_connections():
+    """Refresh planner statistics and close the cached connections; closing the
+    last connection also checkpoints the WAL into the main database file"""
+    for conn in _open_connections:
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _open_connections.clear()
+
+def reveal_in_file_manager(path: str):
+    """Show path in the platform's file manager (no shell involved)"""
+    if sys.platform == 'darwin':
+        cmd = ['open', '-R', path]
+    elif sys.platform == 'win32':
+        cmd = f'explorer /select,"{path}"'  # explorer wants the quotes after the comma
+    else:
+        cmd = ['xdg-open', os.path.dirname(path)]  # no portable "select this file"
+    
+    try:
+        subprocess.Popen(cmd)
+    except OSError as e:
+        print(f"Error opening file location {path}: {e}")
+
 class CorrectionLearningSystem:
     """System for handling user corrections and active learning"""
     
     def __init__(self):
         self.corrections_db = "selecta_corrections.db"
         self.init_corrections_database()
+        self.user_sub_categories = self.get_user_categories()  # shared by every correction dialog
         
     def init_corrections_database(self):
         """Initialize database for storing user corrections"""
-        conn = sqlite3.connect(self.corrections_db)
+        conn = _connect(self.corrections_db)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -68,9 +207,8 @@ class CorrectionLearningSystem:
             )
         ''')
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+        _create_without_rowid(conn, 'user_categories', '''
+            CREATE TABLE user_categories (
                 main_category TEXT NOT NULL,
                 sub_category TEXT NOT NULL,
                 user_description TEXT,
@@ -79,9 +217,10 @@ class CorrectionLearningSystem:
                 ai_confidence_threshold REAL DEFAULT 0.8,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(main_category, sub_category)
-            )
-        ''')
+                PRIMARY KEY (main_category, sub_category)
+            ) WITHOUT ROWID
+        ''', ['main_category', 'sub_category', 'user_description', 'sample_count', 'ai_enabled',
+              'ai_confidence_threshold', 'created_at', 'updated_at'])
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS category_usage (
@@ -94,12 +233,46 @@ class CorrectionLearningSystem:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Pending corrections are the only ones ever queried
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_corr_pending ON user_corrections(applied_to_training)
+            WHERE applied_to_training = FALSE
+        ''')
+        _analyze_once(conn)
+        
+    def get_user_categories(self) -> Dict[str, List[str]]:
+        """Load user-created subcategories from database, grouped by main category"""
+        user_sub_categories = {}
+        try:
+            cursor = _connect(self.corrections_db).cursor()
+            cursor.execute('''
+                SELECT main_category, sub_category 
+                FROM user_categories 
+                ORDER BY main_category, sub_category
+            ''')
+            for main_cat, sub_cat in cursor.fetchall():
+                user_sub_categories.setdefault(main_cat, []).append(sub_cat)
+                
+        except Exception as e:
+            print(f"Error loading user categories: {e}")
+        
+        return user_sub_categories
+    
+    def add_user_category(self, main_category: str, sub_category: str, description: str = None):
+        """Save a new user subcategory and add it to the shared cache"""
+        _connect(self.corrections_db).execute('''
+            INSERT OR IGNORE INTO user_categories 
+            (main_category, sub_category, user_description, sample_count, ai_enabled)
+            VALUES (?, ?, ?, 0, FALSE)
+        ''', (main_category, sub_category, description))
+        
+        subs = self.user_sub_categories.setdefault(main_category, [])
+        if sub_category not in subs:
+            subs.append(sub_category)
     
     def save_correction(self, correction_data: Dict) -> int:
         """Save user correction to database"""
-        conn = sqlite3.connect(self.corrections_db)
+        conn = _connect(self.corrections_db)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -121,14 +294,12 @@ class CorrectionLearningSystem:
         ))
         
         correction_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         return correction_id
     
     def get_corrections_for_training(self) -> List[Dict]:
         """Get corrections that haven't been applied to training yet"""
-        conn = sqlite3.connect(self.corrections_db)
+        conn = _connect(self.corrections_db)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -152,23 +323,24 @@ class CorrectionLearningSystem:
                 'user_notes': row[10]
             })
         
-        conn.close()
         return corrections
     
     def mark_corrections_applied(self, correction_ids: List[int]):
         """Mark corrections as applied to training"""
-        conn = sqlite3.connect(self.corrections_db)
-        cursor = conn.cursor()
+        conn = _connect(self.corrections_db)
+        
+        # Autocommit connection: one explicit transaction, one UPDATE per chunk of ids
+        # (chunks stay under SQLite's default limit on bound parameters)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for start in range(0, len(correction_ids), SQL_IN_CHUNK):
+                chunk = correction_ids[start:start + SQL_IN_CHUNK]
+                conn.execute(
+                    f'UPDATE user_corrections SET applied_to_training = TRUE '
+                    f'WHERE id IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
         
-        for correction_id in correction_ids:
-            cursor.execute(
-                'UPDATE user_corrections SET applied_to_training = TRUE WHERE id = ?',
-                (correction_id,)
-            )
-        
-        conn.commit()
-        conn.close()
-    
     def prepare_correction_data_for_training(self) -> Dict:
         """Prepare correction data for retraining"""
         corrections = self.get_corrections_for_training()
@@ -199,14 +371,19 @@ class AudioLibraryScannerEnhanced:
     
     def __init__(self):
         self.classifier = None
+        self.model_version = None  # timestamp of the loaded models, stored with each classification
         self.db_path = "selecta_library_enhanced.db"
-        self.supported_formats = {'.wav', '.mp3', '.flac', '.m4a', '.aiff', '.ogg'}
+        self.supported_formats = SUPPORTED_FORMATS
+        self._suffix_tuple = tuple(self.supported_formats)  # for str.endswith in the scan loop
+        self._suffix_len = max(map(len, self._suffix_tuple))  # only this much of a name is lowercased
+        self.scan_stats = {}  # file_path -> stat from the last scan, when it came free
+        self._pending_saves = []  # results waiting for the next batched write
         self.correction_system = CorrectionLearningSystem()
         self.init_database()
         
     def init_database(self):
         """Initialize SQLite database for storing classifications"""
-        conn = sqlite3.connect(self.db_path)
+        conn = _connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -234,9 +411,13 @@ class AudioLibraryScannerEnhanced:
                 last_played TIMESTAMP,
                 play_count INTEGER DEFAULT 0,
                 duration_seconds REAL,
-                file_format TEXT
+                file_format TEXT,
+                model_version TEXT
             )
         ''')
+        # Rows from before model_version existed read as another model's, so they get reclassified
+        if 'model_version' not in {row[1] for row in cursor.execute("PRAGMA table_info(audio_files)")}:
+            cursor.execute("ALTER TABLE audio_files ADD COLUMN model_version TEXT")
         
         # Create playlists table
         cursor.execute('''
@@ -249,67 +430,291 @@ class AudioLibraryScannerEnhanced:
             )
         ''')
         
-        # Create playlist tracks table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS playlist_tracks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                playlist_id INTEGER,
-                file_id INTEGER,
-                position INTEGER,
+        # Create playlist tracks table, clustered in playlist order
+        _create_without_rowid(conn, 'playlist_tracks', '''
+            CREATE TABLE playlist_tracks (
+                playlist_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
                 added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (playlist_id, position, file_id),
                 FOREIGN KEY (playlist_id) REFERENCES playlists (id),
                 FOREIGN KEY (file_id) REFERENCES audio_files (id)
-            )
+            ) WITHOUT ROWID
+        ''', ['playlist_id', 'position', 'file_id', 'added_at'])
+        
+        # Probability maps live beside audio_files so scans of the main table never read them
+        # (rows saved before this table existed keep theirs in the audio_files columns)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS audio_file_probabilities (
+                file_path TEXT PRIMARY KEY,
+                main_probabilities TEXT,
+                sub_probabilities TEXT
+            ) WITHOUT ROWID
+        ''')
+        # Model output by file content, so moved or renamed files skip the classifier;
+        # caches from before model_version can't say which model wrote them, so start over
+        cache_columns = {row[1] for row in cursor.execute("PRAGMA table_info(classification_cache)")}
+        if cache_columns and 'model_version' not in cache_columns:
+            cursor.execute("DROP TABLE classification_cache")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS classification_cache (
+                content_key TEXT PRIMARY KEY,
+                main_category TEXT,
+                sub_category TEXT,
+                main_confidence REAL,
+                sub_confidence REAL,
+                model_version TEXT,
+                main_probabilities TEXT,
+                sub_probabilities TEXT,
+                saved_at TIMESTAMP
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_probabilities_delete AFTER DELETE ON audio_files
+            BEGIN
+                DELETE FROM audio_file_probabilities WHERE file_path = OLD.file_path;
+            END
         ''')
         
-        conn.commit()
-        conn.close()
+        # Same definitions as LibraryManager.create_indexes, so whichever runs first wins
+        # (file_path is UNIQUE and already has its own index)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cat ON audio_files(main_category, sub_category, filename)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_filename ON audio_files(filename, id)")
+        # Covers the results list query (iter_classifications) so it never touches the table
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_files_list_cover ON audio_files(
+                filename, main_category, sub_category, main_confidence, sub_confidence,
+                correction_count, user_verified, file_path)
+        ''')
+        _analyze_once(conn)
         
     def load_classifier(self, model_timestamp='20250617_155623'):
         """Load the trained hierarchical classifier"""
         try:
             self.classifier = HierarchicalAudioClassifier(strategy='cascade')
             self.classifier.load_models(model_timestamp)
+            self.model_version = model_timestamp
+            self.prune_classification_cache()
             return True
         except Exception as e:
             print(f"Error loading classifier: {e}")
             return False
     
-    def classify_file(self, file_path: str) -> Optional[Dict]:
-        """Classify a single audio file"""
+    def prune_classification_cache(self):
+        """Drop content-cache rows of other models and trim it to CLASSIFICATION_CACHE_MAX_ROWS"""
+        conn = _connect(self.db_path)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM classification_cache WHERE model_version IS NOT ?", (self.model_version,))
+            conn.execute('''
+                DELETE FROM classification_cache WHERE content_key IN (
+                    SELECT content_key FROM classification_cache
+                    ORDER BY saved_at DESC LIMIT -1 OFFSET ?)
+            ''', (CLASSIFICATION_CACHE_MAX_ROWS,))
+    
+    def classify_file(self, file_path: str, file_stat: Optional[os.stat_result] = None) -> Optional[Dict]:
+        """Classify a single audio file, reusing the scanner's stat when given"""
         if not self.classifier:
             return None
             
         try:
-            result = self.classifier.predict_cascade(file_path)
+            cached, file_stat, content_key = self.lookup_cached_classification(file_path, file_stat)
+            if cached or file_stat is None:
+                return cached
             
-            # Add file metadata
-            file_stat = os.stat(file_path)
-            result.update({
-                'file_path': file_path,
-                'filename': os.path.basename(file_path),
-                'file_size': file_stat.st_size,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            return result
+            result = self.classifier.predict_cascade(file_path)
+            return self.add_file_metadata(result, file_path, file_stat, content_key)
             
         except Exception as e:
             print(f"Error classifying {file_path}: {e}")
             return None
     
+    def lookup_cached_classification(self, file_path: str, file_stat: Optional[os.stat_result] = None
+                                     ) -> Tuple[Optional[Dict], Optional[os.stat_result], Optional[str]]:
+        """(cached result or None, file stat, content key) - stat is None if the file can't be read"""
+        try:
+            if file_stat is None:
+                file_stat = self.scan_stats.get(file_path) or os.stat(file_path)
+        except OSError as e:
+            print(f"Error classifying {file_path}: {e}")
+            return None, None, None
+        
+        cached = self.get_cached_classification(file_path, file_stat)
+        if cached:
+            return cached, file_stat, None
+        
+        content_key = self.content_key(file_path, file_stat)
+        if content_key:
+            cached = self.get_content_cached_classification(file_path, file_stat, content_key)
+        return cached, file_stat, content_key
+    
+    @staticmethod
+    def add_file_metadata(result: Dict, file_path: str, file_stat: os.stat_result,
+                          content_key: Optional[str], timestamp: Optional[str] = None) -> Dict:
+        """Fill in the file fields of a fresh model result"""
+        result.update({
+            'file_path': file_path,
+            'filename': os.path.basename(file_path),
+            'file_size': file_stat.st_size,
+            'timestamp': timestamp or datetime.now().isoformat(),
+            'content_key': content_key
+        })
+        return result
+    
+    @staticmethod
+    def content_key(file_path: str, file_stat: os.stat_result) -> Optional[str]:
+        """Cheap content fingerprint from size, mtime and the first and last CONTENT_KEY_BYTES"""
+        digest = hashlib.sha1(f"{file_stat.st_size}:{int(file_stat.st_mtime)}:".encode())
+        try:
+            with open(file_path, 'rb') as f:
+                digest.update(f.read(CONTENT_KEY_BYTES))
+                if file_stat.st_size > 2 * CONTENT_KEY_BYTES:
+                    f.seek(-CONTENT_KEY_BYTES, os.SEEK_END)
+                    digest.update(f.read())
+        except OSError:
+            return None
+        return digest.hexdigest()
+    
+    def get_content_cached_classification(self, file_path: str, file_stat: os.stat_result,
+                                          content_key: str) -> Optional[Dict]:
+        """Classification of identical content the loaded model saw under another path, as a new result for file_path"""
+        row = _connect(self.db_path).execute('''
+            SELECT main_category, sub_category, main_confidence, sub_confidence,
+                   main_probabilities, sub_probabilities
+            FROM classification_cache
+            WHERE content_key = ? AND model_version = ?
+        ''', (content_key, self.model_version)).fetchone()
+        
+        if not row:
+            return None
+        
+        # Not flagged 'cached': this path has no audio_files row yet, so the scan saves it
+        return {
+            'file_path': file_path,
+            'filename': os.path.basename(file_path),
+            'file_size': file_stat.st_size,
+            'main_category': row[0],
+            'sub_category': row[1],
+            'main_confidence': row[2],
+            'sub_confidence': row[3] or 0.0,
+            'main_probabilities': json.loads(row[4]) if row[4] else {},
+            'sub_probabilities': json.loads(row[5]) if row[5] else {},
+            'timestamp': datetime.now().isoformat(),
+            'content_key': content_key
+        }
+    
+    def get_cached_classification(self, file_path: str, file_stat: os.stat_result) -> Optional[Dict]:
+        """Stored classification for file_path if the file is unchanged since the loaded model saved it"""
+        # Same size and not modified after the row was written (updated_at has whole-second precision);
+        # user-corrected rows hold the user's categories, so they stand whichever model is loaded
+        row = _connect(self.db_path).execute('''
+            SELECT af.filename, af.file_size, af.main_category, af.sub_category,
+                   af.main_confidence, af.sub_confidence,
+                   COALESCE(p.main_probabilities, af.main_probabilities),
+                   COALESCE(p.sub_probabilities, af.sub_probabilities), af.updated_at
+            FROM audio_files af
+            LEFT JOIN audio_file_probabilities p ON p.file_path = af.file_path
+            WHERE af.file_path = ? AND af.file_size = ? AND af.updated_at > datetime(?, 'unixepoch')
+              AND (af.model_version = ? OR af.correction_count > 0)
+        ''', (file_path, file_stat.st_size, int(file_stat.st_mtime), self.model_version)).fetchone()
+        
+        if not row or row[2] is None:
+            return None
+        
+        return {
+            'file_path': file_path,
+            'filename': row[0],
+            'file_size': row[1],
+            'main_category': row[2],
+            'sub_category': row[3],
+            'main_confidence': row[4],
+            'sub_confidence': row[5] or 0.0,
+            'main_probabilities': json.loads(row[6]) if row[6] else {},
+            'sub_probabilities': json.loads(row[7]) if row[7] else {},
+            'timestamp': row[8],
+            'cached': True
+        }
+    
+    def classify_files_batched(self, file_paths: List[str], batch_size: int = CLASSIFY_BATCH_SIZE,
+                               n_workers: Optional[int] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Classify files, yielding (file_path, result) as cache hits and model batches finish"""
+        if not self.classifier:
+            for file_path in file_paths:
+                yield file_path, None
+            return
+        
+        # Decoding and feature extraction stream through a thread pool (librosa's FFTs release
+        # the GIL); the models run on each full batch while the pool keeps decoding the next
+        n_workers = n_workers or os.cpu_count() or 1
+        paths = iter(file_paths)
+        in_flight = {}  # future -> (file_path, file_stat, content_key)
+        ready = []      # (file_path, file_stat, content_key, features) waiting for the models
+        
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            try:
+                while True:
+                    # Keep at most two files queued per worker; cached files never reach the pool
+                    while len(in_flight) < 2 * n_workers:
+                        file_path = next(paths, None)
+                        if file_path is None:
+                            break
+                        
+                        cached, file_stat, content_key = self.lookup_cached_classification(file_path)
+                        if cached or file_stat is None:
+                            yield file_path, cached
+                        else:
+                            future = pool.submit(self.classifier.extract_enhanced_features, file_path)
+                            in_flight[future] = (file_path, file_stat, content_key)
+                    
+                    if in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            ready.append(in_flight.pop(future) + (future.result(),))
+                    
+                    if len(ready) >= batch_size or (ready and not in_flight):
+                        yield from self.predict_ready(ready)
+                        ready = []
+                    elif not in_flight:
+                        break
+            finally:
+                # Closing the generator early (scan stopped) drops the files not yet started
+                for future in in_flight:
+                    future.cancel()
+    
+    def predict_ready(self, ready: List[Tuple]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Run the models once over a batch of extracted features, yielding (file_path, result)"""
+        try:
+            predictions = self.classifier.predict_features_batch([item[3] for item in ready])
+        except Exception as e:
+            print(f"Error classifying batch: {e}")
+            predictions = [None] * len(ready)
+        
+        timestamp = datetime.now().isoformat()
+        for (file_path, file_stat, content_key, _), result in zip(ready, predictions):
+            if result is not None:
+                self.add_file_metadata(result, file_path, file_stat, content_key, timestamp)
+            yield file_path, result
+    
+    def queue_classification(self, result: Dict):
+        """Buffer a result for saving, writing the buffer out every SAVE_BATCH_SIZE results"""
+        self._pending_saves.append(result)
+        if len(self._pending_saves) >= SAVE_BATCH_SIZE:
+            self.flush()
+    
+    def flush(self):
+        """Save any buffered results in one transaction"""
+        if self._pending_saves:
+            pending, self._pending_saves = self._pending_saves, []
+            self.save_classifications_bulk(pending)
+    
     def save_classification(self, result: Dict):
         """Save classification result to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO audio_files 
-            (file_path, filename, file_size, main_category, sub_category, 
-             main_confidence, sub_confidence, main_probabilities, sub_probabilities, 
-             updated_at, user_verified)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, FALSE)
-        ''', (
+        self.save_classifications_bulk([result])
+    
+    def save_classifications_bulk(self, results: List[Dict]):
+        """Save many classification results in a single transaction"""
+        rows = [(
             result['file_path'],
             result['filename'], 
             result['file_size'],
@@ -317,16 +722,35 @@ class AudioLibraryScannerEnhanced:
             result.get('sub_category'),
             result['main_confidence'],
             result.get('sub_confidence', 0.0),
-            json.dumps(result['main_probabilities']),
-            json.dumps(result.get('sub_probabilities', {}))
-        ))
-        
-        conn.commit()
-        conn.close()
+            self.model_version
+        ) for result in results]
+        probabilities = [(
+            result['file_path'],
+            json.dumps(result['main_probabilities'], separators=(',', ':')),
+            json.dumps(result.get('sub_probabilities', {}), separators=(',', ':'))
+        ) for result in results]
+        cache_rows = [
+            (result['content_key'],) + row[3:] + probs[1:]
+            for result, row, probs in zip(results, rows, probabilities)
+            if result.get('content_key')
+        ]
+        
+        conn = _connect(self.db_path)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(SAVE_AUDIO_FILE_SQL, rows)
+            conn.executemany(SAVE_PROBABILITIES_SQL, probabilities)
+            conn.executemany(SAVE_CLASSIFICATION_CACHE_SQL, cache_rows)
+        
+    def set_user_verified(self, file_id: int, verdict: str):
+        """Record the user's verdict ('correct' or 'incorrect') on a classification"""
+        _connect(self.db_path).execute(
+            "UPDATE audio_files SET user_verified = ? WHERE id = ?", (verdict, file_id)
+        )
     
     def update_classification_with_correction(self, file_path: str, correction_data: Dict):
         """Update classification in database with user correction"""
-        conn = sqlite3.connect(self.db_path)
+        conn = _connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -342,53 +766,54 @@ class AudioLibraryScannerEnhanced:
             file_path
         ))
         
-        conn.commit()
-        conn.close()
-    
     def scan_directory(self, root_dir: str, progress_callback=None) -> List[str]:
         """Scan directory for audio files"""
         audio_files = []
-        root_path = Path(root_dir)
-        
-        for file_path in root_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                audio_files.append(str(file_path))
-                if progress_callback:
-                    progress_callback(f"Found: {file_path.name}")
+        pending_dirs = [root_dir]
+        self.scan_stats = {}
+        
+        # scandir entries carry their type, so rejected files cost no stat or Path object
+        while pending_dirs:
+            try:
+                entries = os.scandir(pending_dirs.pop())
+            except OSError:
+                continue  # unreadable directory, skipped like rglob does
+            
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                    elif entry.name[-self._suffix_len:].lower().endswith(self._suffix_tuple) and entry.is_file():
+                        audio_files.append(entry.path)
+                        if _SCANDIR_HAS_STAT:
+                            self.scan_stats[entry.path] = entry.stat()
+                        if progress_callback and len(audio_files) % PROGRESS_EVERY == 0:
+                            progress_callback(f"Found: {entry.name} ({len(audio_files)} files)")
+        
+        if progress_callback:
+            progress_callback(f"Found {len(audio_files)} audio files")
         
         return audio_files
     
     def get_library_stats(self) -> Dict:
         """Get statistics about the classified library"""
-        conn = sqlite3.connect(self.db_path)
+        conn = _connect(self.db_path)
         cursor = conn.cursor()
         
-        # Total files
-        cursor.execute('SELECT COUNT(*) FROM audio_files')
-        total_files = cursor.fetchone()[0]
-        
-        # Category breakdown
-        cursor.execute('''
-            SELECT main_category, COUNT(*) 
-            FROM audio_files 
-            GROUP BY main_category
-        ''')
-        main_categories = dict(cursor.fetchall())
-        
-        # Subcategory breakdown
+        # One grouped pass (covering scan of idx_cat) yields totals, categories and subcategories
         cursor.execute('''
             SELECT main_category, sub_category, COUNT(*) 
             FROM audio_files 
-            WHERE sub_category IS NOT NULL
             GROUP BY main_category, sub_category
         ''')
+        total_files = 0
+        main_categories = {}
         subcategories = {}
         for main_cat, sub_cat, count in cursor.fetchall():
-            if main_cat not in subcategories:
-                subcategories[main_cat] = {}
-            subcategories[main_cat][sub_cat] = count
-        
-        conn.close()
+            total_files += count
+            main_categories[main_cat] = main_categories.get(main_cat, 0) + count
+            if sub_cat is not None:
+                subcategories.setdefault(main_cat, {})[sub_cat] = count
         
         return {
             'total_files': total_files,
@@ -398,8 +823,22 @@ class AudioLibraryScannerEnhanced:
     
     def get_all_classifications(self) -> List[Dict]:
         """Get all classifications from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return list(self.iter_classifications())
+    
+    def get_classifications_frame(self) -> pd.DataFrame:
+        """Load all classifications in filename order as one columnar DataFrame"""
+        return pd.read_sql_query('''
+            SELECT file_path, filename, main_category, sub_category, 
+                   main_confidence, sub_confidence, correction_count, user_verified
+            FROM audio_files
+            ORDER BY filename
+        ''', _connect(self.db_path))
+    
+    def iter_classifications(self) -> Iterator[Dict]:
+        """Stream all classifications in filename order, fetching in batches"""
+        cursor = _connect(self.db_path).cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.arraysize = 1000
         
         cursor.execute('''
             SELECT file_path, filename, main_category, sub_category, 
@@ -408,21 +847,12 @@ class AudioLibraryScannerEnhanced:
             ORDER BY filename
         ''')
         
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'file_path': row[0],
-                'filename': row[1],
-                'main_category': row[2],
-                'sub_category': row[3],
-                'main_confidence': row[4],
-                'sub_confidence': row[5],
-                'correction_count': row[6],
-                'user_verified': row[7]
-            })
-        
-        conn.close()
-        return results
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
 
 class CorrectionDialog:
     """Dialog for correcting classifications with dynamic subcategory creation"""
@@ -448,37 +878,22 @@ class CorrectionDialog:
         self.create_dialog()
     
     def load_user_categories(self):
-        """Load user-created subcategories from database"""
+        """Merge the correction system's cached user subcategories into the base ones"""
         if not self.correction_system:
             self.sub_categories = self.base_sub_categories.copy()
             return
-            
-        try:
-            conn = sqlite3.connect(self.correction_system.corrections_db)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT main_category, sub_category 
-                FROM user_categories 
-                ORDER BY main_category, sub_category
-            ''')
-            
-            # Start with base categories
-            self.sub_categories = {}
-            for main_cat in self.main_categories:
-                self.sub_categories[main_cat] = self.base_sub_categories[main_cat].copy()
-            
-            # Add user categories
-            for main_cat, sub_cat in cursor.fetchall():
-                if main_cat in self.sub_categories:
+        
+        # Start with base categories
+        self.sub_categories = {}
+        for main_cat in self.main_categories:
+            self.sub_categories[main_cat] = self.base_sub_categories[main_cat].copy()
+        
+        # Add user categories
+        for main_cat, sub_cats in self.correction_system.user_sub_categories.items():
+            if main_cat in self.sub_categories:
+                for sub_cat in sub_cats:
                     if sub_cat not in self.sub_categories[main_cat]:
                         self.sub_categories[main_cat].append(sub_cat)
-            
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error loading user categories: {e}")
-            self.sub_categories = self.base_sub_categories.copy()
     
     def create_dialog(self):
         """Create the correction dialog"""
@@ -610,7 +1025,8 @@ class CorrectionDialog:
             return
         
         # Create new subcategory dialog
-        new_sub_dialog = NewSubcategoryDialog(self.dialog, main_cat, self.correction_system)
+        new_sub_dialog = NewSubcategoryDialog(self.dialog, main_cat, self.correction_system,
+                                              self.sub_categories)
         self.dialog.wait_window(new_sub_dialog.dialog)
         
         if new_sub_dialog.result:
@@ -638,10 +1054,12 @@ class CorrectionDialog:
 class NewSubcategoryDialog:
     """Dialog for creating a new subcategory"""
     
-    def __init__(self, parent, main_category: str, correction_system=None):
+    def __init__(self, parent, main_category: str, correction_system=None,
+                 sub_categories: Optional[Dict[str, List[str]]] = None):
         self.parent = parent
         self.main_category = main_category
         self.correction_system = correction_system
+        self.sub_categories = sub_categories
         self.result = None
         
         self.create_dialog()
@@ -740,47 +1158,24 @@ class NewSubcategoryDialog:
     
     def validate_subcategory_name(self, name: str) -> bool:
         """Validate subcategory name format"""
-        import re
         # Allow lowercase letters, numbers, and underscores
-        return bool(re.match(r'^[a-z0-9_]+$', name))
+        return bool(name) and _NAME_ALLOWED.issuperset(name)
     
     def subcategory_exists(self, subcategory_name: str) -> bool:
         """Check if subcategory already exists"""
+        # The calling dialog's map already merges base and user subcategories
+        if self.sub_categories is not None:
+            return subcategory_name in self.sub_categories.get(self.main_category, ())
+        
         if not self.correction_system:
             return False
-            
-        try:
-            conn = sqlite3.connect(self.correction_system.corrections_db)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                'SELECT COUNT(*) FROM user_categories WHERE main_category = ? AND sub_category = ?',
-                (self.main_category, subcategory_name)
-            )
-            
-            exists = cursor.fetchone()[0] > 0
-            conn.close()
-            
-            return exists
-            
-        except Exception as e:
-            print(f"Error checking subcategory existence: {e}")
-            return False
+        
+        return subcategory_name in self.correction_system.user_sub_categories.get(self.main_category, [])
     
     def save_new_subcategory(self, subcategory_name: str, description: str):
         """Save new subcategory to database"""
         try:
-            conn = sqlite3.connect(self.correction_system.corrections_db)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO user_categories 
-                (main_category, sub_category, user_description, sample_count, ai_enabled)
-                VALUES (?, ?, ?, 0, FALSE)
-            ''', (self.main_category, subcategory_name, description))
-            
-            conn.commit()
-            conn.close()
+            self.correction_system.add_user_category(self.main_category, subcategory_name, description)
             
         except Exception as e:
             print(f"Error saving new subcategory: {e}")
@@ -802,8 +1197,16 @@ class SelectaDesktopAppEnhanced:
         # Backend
         self.scanner = AudioLibraryScannerEnhanced()
         self.scan_queue = queue.Queue()
+        self._wake_pending = threading.Event()  # a <<ScanUpdate>> is already on its way
         self.scan_thread = None
         self.is_scanning = False
+        self._library_df = None
+        self._row_by_path = {}  # file_path -> row of _library_df
+        self._scanned_by_path = {}  # results added by a scan since the last refresh
+        self._result_rows = []  # display tuples for every result; the tree only holds the visible ones
+        self._result_paths = []  # file_path of each entry in _result_rows
+        self._view_top = 0
+        self._selected_row = None
         
         # Variables
         self.selected_directory = tk.StringVar()
@@ -812,6 +1215,7 @@ class SelectaDesktopAppEnhanced:
         self.total_files = tk.IntVar()
         
         self.setup_ui()
+        self.root.bind('<<ScanUpdate>>', self.drain_scan_queue)
         self.load_models()
         self.refresh_results()  # Load existing results
         
@@ -914,12 +1318,18 @@ class SelectaDesktopAppEnhanced:
         self.results_tree.bind("<Button-2>", self.show_context_menu)  # Mac right-click
         self.results_tree.bind("<Button-3>", self.show_context_menu)  # Windows/Linux right-click
         
-        # Scrollbar for tree
-        tree_scroll = ttk.Scrollbar(results_frame, orient="vertical", command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=tree_scroll.set)
+        # Scrollbar for tree; it spans every result while the tree only holds the visible rows
+        self.tree_scroll = ttk.Scrollbar(results_frame, orient="vertical", command=self.scroll_results)
+        self.results_tree.bind("<Configure>", lambda event: self.show_result_window())
+        self.results_tree.bind("<MouseWheel>", self.on_results_wheel)
+        self.results_tree.bind("<Button-4>", self.on_results_wheel)  # Linux wheel up
+        self.results_tree.bind("<Button-5>", self.on_results_wheel)  # Linux wheel down
+        self.results_tree.bind("<<TreeviewSelect>>", self.on_result_select)
+        self.results_tree.bind("<Up>", self.on_results_key)
+        self.results_tree.bind("<Down>", self.on_results_key)
         
         self.results_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.tree_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # Status bar
         self.status_var = tk.StringVar(value="Ready - Enhanced with AI Learning")
@@ -965,19 +1375,8 @@ class SelectaDesktopAppEnhanced:
             messagebox.showwarning("No Selection", "Please select a file to correct.")
             return
         
-        item = selection[0]
-        values = self.results_tree.item(item, 'values')
-        
-        # Get the file path from our data
-        filename = values[0]
-        
         # Find the full result data
-        all_results = self.scanner.get_all_classifications()
-        file_result = None
-        for result in all_results:
-            if result['filename'] == filename:
-                file_result = result
-                break
+        file_result = self.find_result(self.selected_file_path())
         
         if not file_result:
             messagebox.showerror("Error", "Could not find file data for correction.")
@@ -1100,44 +1499,136 @@ class SelectaDesktopAppEnhanced:
         if not selection:
             return
         
-        item = selection[0]
-        values = self.results_tree.item(item, 'values')
-        filename = values[0]
-        
-        # Find the full file path
-        all_results = self.scanner.get_all_classifications()
-        for result in all_results:
-            if result['filename'] == filename:
-                file_path = result['file_path']
-                if os.path.exists(file_path):
-                    # Open file location (Mac)
-                    os.system(f'open -R "{file_path}"')
-                break
+        file_path = self.selected_file_path()
+        if os.path.exists(file_path):
+            reveal_in_file_manager(file_path)
+    
+    def selected_file_path(self) -> Optional[str]:
+        """Full path of the selected result, straight from the row model"""
+        selection = self.results_tree.selection()
+        if not selection:
+            return None
+        return self._result_paths[self._view_top + self.results_tree.index(selection[0])]
+    
+    def find_result(self, file_path: str) -> Optional[Dict]:
+        """Look up a displayed classification by its file path"""
+        result = self._scanned_by_path.get(file_path)
+        if result:
+            return result
+        
+        row = self._row_by_path.get(file_path)
+        if row is None:
+            return None
+        
+        # NULL columns come back as NaN; hand the dialogs None like the DB rows do
+        record = self._library_df.iloc[[row]].astype(object)
+        return record.where(record.notna(), None).to_dict('records')[0]
     
     def refresh_results(self):
         """Refresh the results tree with current data"""
-        # Clear existing items
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-        
-        # Load all classifications
-        results = self.scanner.get_all_classifications()
-        
-        for result in results:
-            main_conf = f"{result['main_confidence']:.3f}" if result['main_confidence'] else ''
-            sub_conf = f"{result['sub_confidence']:.3f}" if result['sub_confidence'] else ''
-            corrections = str(result['correction_count'])
-            verified = "✅" if result['user_verified'] else "❌"
-            
-            self.results_tree.insert('', 'end', values=(
-                result['filename'],
-                result['main_category'] or '',
-                result['sub_category'] or '',
-                main_conf,
-                sub_conf,
-                corrections,
-                verified
-            ))
+        # Load all classifications as columns and format each column in one pass
+        df = self._library_df = self.scanner.get_classifications_frame()
+        self._row_by_path = dict(zip(df['file_path'], range(len(df))))
+        self._scanned_by_path = {}
+        display = pd.DataFrame({
+            'filename': df['filename'],
+            'main_category': df['main_category'].fillna(''),
+            'sub_category': df['sub_category'].fillna(''),
+            'main_confidence': self.format_confidence(df['main_confidence']),
+            'sub_confidence': self.format_confidence(df['sub_confidence']),
+            'corrections': df['correction_count'].fillna(0).astype(int).astype(str),
+            'verified': df['user_verified'].fillna(0).astype(bool).map({True: "✅", False: "❌"})
+        })
+        
+        self._result_rows = list(display.itertuples(index=False, name=None))
+        self._result_paths = df['file_path'].tolist()
+        self.show_result_window()
+    
+    @staticmethod
+    def format_confidence(confidence: pd.Series) -> pd.Series:
+        """Format confidences to 3 places, blank where missing or zero"""
+        text = confidence.map('{:.3f}'.format, na_action='ignore')
+        return text.where(confidence.fillna(0) != 0, '')
+    
+    def visible_result_rows(self) -> int:
+        """Number of rows that fit in the results tree"""
+        items = self.results_tree.get_children()
+        bbox = self.results_tree.bbox(items[0]) if items else ''
+        if not bbox:
+            return int(self.results_tree.cget('height'))
+        
+        _, y, _, row_height = bbox
+        return max(1, (self.results_tree.winfo_height() - y) // row_height)
+    
+    def show_result_window(self, top: Optional[int] = None):
+        """Fill the tree with the results that fit, starting at row top (default: where it is)"""
+        rows = self._result_rows
+        visible = self.visible_result_rows()
+        top = self._view_top if top is None else top
+        top = self._view_top = max(0, min(top, len(rows) - visible))
+        window = rows[top:top + visible]
+        
+        # Recycle the existing items; only the difference is inserted or deleted
+        items = self.results_tree.get_children()
+        for item, values in zip(items, window):
+            self.results_tree.item(item, values=values)
+        for values in window[len(items):]:
+            self.results_tree.insert('', 'end', values=values)
+        if len(items) > len(window):
+            self.results_tree.delete(*items[len(window):])
+        
+        # Keep the selection on the same result, not the same screen row
+        items = self.results_tree.get_children()
+        selected = -1 if self._selected_row is None else self._selected_row - top
+        if 0 <= selected < len(items):
+            self.results_tree.selection_set(items[selected])
+            self.results_tree.focus(items[selected])
+        else:
+            self.results_tree.selection_set(())
+        
+        if rows:
+            self.tree_scroll.set(top / len(rows), (top + len(window)) / len(rows))
+        else:
+            self.tree_scroll.set(0, 1)
+    
+    def scroll_results(self, action, amount, unit=None):
+        """Scrollbar command: move the visible window over the full result list"""
+        if action == 'moveto':
+            top = int(float(amount) * len(self._result_rows))
+        else:
+            step = self.visible_result_rows() if unit == 'pages' else 1
+            top = self._view_top + int(amount) * step
+        self.show_result_window(top)
+    
+    def on_results_wheel(self, event):
+        """Scroll the results with the mouse wheel"""
+        up = event.num == 4 or event.delta > 0
+        self.show_result_window(self._view_top + (-WHEEL_ROWS if up else WHEEL_ROWS))
+        return "break"
+    
+    def on_results_key(self, event):
+        """Arrow keys past the first or last visible row scroll the window instead"""
+        items = self.results_tree.get_children()
+        focus = self.results_tree.focus()
+        if not focus:
+            return None
+        
+        step = -1 if event.keysym == 'Up' else 1
+        index = self.results_tree.index(focus) + step
+        if 0 <= index < len(items):
+            return None  # still inside the window; the default binding moves the selection
+        
+        row = self._view_top + index
+        if 0 <= row < len(self._result_rows):
+            self._selected_row = row
+            self.show_result_window(self._view_top + step)
+        return "break"
+    
+    def on_result_select(self, event):
+        """Remember which result is selected so scrolling keeps it"""
+        selection = self.results_tree.selection()
+        if selection:
+            self._selected_row = self._view_top + self.results_tree.index(selection[0])
     
     # ... (rest of the methods from the original app remain the same)
     def start_scan(self):
@@ -1169,104 +1660,125 @@ class SelectaDesktopAppEnhanced:
         """Worker thread for scanning files"""
         try:
             # Scan for audio files
-            self.scan_queue.put(("status", "Scanning for audio files..."))
+            self.post_scan_message(("status", "Scanning for audio files..."))
             audio_files = self.scanner.scan_directory(
                 self.selected_directory.get(),
-                lambda msg: self.scan_queue.put(("progress", msg))
+                lambda msg: self.post_scan_message(("progress", msg))
             )
             
             if not audio_files:
-                self.scan_queue.put(("status", "No audio files found in directory"))
-                self.scan_queue.put(("complete", None))
+                self.post_scan_message(("status", "No audio files found in directory"))
+                self.post_scan_message(("complete", None))
                 return
             
-            self.scan_queue.put(("total", len(audio_files)))
+            self.post_scan_message(("total", len(audio_files)))
             
-            # Process each file
-            for i, file_path in enumerate(audio_files):
-                if not self.is_scanning:  # Check if stopped
-                    break
-                    
-                self.scan_queue.put(("progress", f"Classifying: {os.path.basename(file_path)}"))
-                
-                # Classify file
-                result = self.scanner.classify_file(file_path)
-                if result:
-                    # Save to database
-                    self.scanner.save_classification(result)
+            # Classify in model batches; this thread is the only database writer and saves in batches
+            classified = self.scanner.classify_files_batched(audio_files)
+            try:
+                for i, (file_path, result) in enumerate(classified, 1):
+                    if not self.is_scanning:  # Check if stopped
+                        break
+                        
+                    if result:
+                        # Unchanged files come back from the database and need no write
+                        if not result.get('cached'):
+                            self.scanner.queue_classification(result)
+                        
+                        # Send to UI
+                        self.post_scan_message(("result", result))
                     
-                    # Send to UI
-                    self.scan_queue.put(("result", result))
-                
-                self.scan_queue.put(("count", i + 1))
+                    self.post_scan_message(("count", i))
+            finally:
+                classified.close()
+                self.scanner.flush()
             
-            self.scan_queue.put(("complete", None))
+            self.post_scan_message(("complete", None))
             
         except Exception as e:
-            self.scan_queue.put(("error", str(e)))
+            self.post_scan_message(("error", str(e)))
     
-    def scan_directory(self, root_dir: str, progress_callback=None):
-        """Scan directory for audio files"""
-        audio_files = []
-        root_path = Path(root_dir)
-        supported_formats = {'.wav', '.mp3', '.flac', '.m4a', '.aiff', '.ogg'}
-        
-        for file_path in root_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in supported_formats:
-                audio_files.append(str(file_path))
-                if progress_callback:
-                    progress_callback(f"Found: {file_path.name}")
-        
-        return audio_files
+    def post_scan_message(self, message):
+        """Queue a scan update and wake the Tk thread, with at most one wakeup in flight"""
+        self.scan_queue.put(message)
+        if not self._wake_pending.is_set():
+            self._wake_pending.set()
+            try:
+                self.root.event_generate('<<ScanUpdate>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                pass  # Tk built without thread support; the check_queue poll delivers it
     
     def check_queue(self):
-        """Check the scan queue for updates"""
+        """Fallback poll while scanning, in case a wakeup event was lost"""
+        self.drain_scan_queue()
+        if self.is_scanning:
+            self.root.after(QUEUE_POLL_MS, self.check_queue)
+    
+    def drain_scan_queue(self, event=None):
+        """Drain queued scan updates and apply them as one UI update"""
+        self._wake_pending.clear()
+        drained = 0
+        status = None
+        count = None
+        results = []
+        final = None
         try:
-            while True:
+            while drained < QUEUE_DRAIN_MAX:
                 msg_type, data = self.scan_queue.get_nowait()
+                drained += 1
                 
-                if msg_type == "status":
-                    self.scan_progress.set(data)
-                elif msg_type == "progress":
-                    self.scan_progress.set(data)
+                if msg_type in ("status", "progress"):
+                    status = data
                 elif msg_type == "total":
                     self.total_files.set(data)
                     self.progress_bar.config(maximum=data)
                 elif msg_type == "count":
-                    self.files_processed.set(data)
-                    self.progress_bar.config(value=data)
-                    self.scan_progress.set(f"Processed {data}/{self.total_files.get()} files")
+                    count = data
+                    status = f"Processed {data}/{self.total_files.get()} files"
                 elif msg_type == "result":
-                    self.add_result_to_tree(data)
-                elif msg_type == "complete":
-                    self.scan_complete()
-                    return
-                elif msg_type == "error":
-                    self.scan_error(data)
-                    return
+                    results.append(data)
+                elif msg_type in ("complete", "error"):
+                    final = (msg_type, data)
+                    break
                     
         except queue.Empty:
             pass
         
-        if self.is_scanning:
-            self.root.after(100, self.check_queue)
+        # Add the whole batch, then redraw once at the end of the list
+        if results:
+            for result in results:
+                self.add_result_to_tree(result)
+            self.show_result_window(len(self._result_rows))
+        
+        # Only the latest progress values are worth drawing
+        if count is not None:
+            self.files_processed.set(count)
+            self.progress_bar.config(value=count)
+        if status is not None:
+            self.scan_progress.set(status)
+        
+        if final:
+            if final[0] == "complete":
+                self.scan_complete()
+            else:
+                self.scan_error(final[1])
+        elif drained == QUEUE_DRAIN_MAX:
+            # More waiting; let Tk redraw before the next batch
+            self.root.after_idle(self.drain_scan_queue)
     
     def add_result_to_tree(self, result):
-        """Add classification result to the tree view"""
+        """Add classification result to the end of the results list"""
         filename = result['filename']
         main_cat = result['main_category']
         sub_cat = result.get('sub_category', '')
         main_conf = f"{result['main_confidence']:.3f}"
         sub_conf = f"{result.get('sub_confidence', 0):.3f}" if result.get('sub_confidence') else ''
         
-        self.results_tree.insert('', 'end', values=(
+        self._scanned_by_path[result['file_path']] = result
+        self._result_paths.append(result['file_path'])
+        self._result_rows.append((
             filename, main_cat, sub_cat, main_conf, sub_conf, '0', '❌'
         ))
-        
-        # Auto-scroll to bottom
-        children = self.results_tree.get_children()
-        if children:
-            self.results_tree.see(children[-1])
     
     def scan_complete(self):
         """Handle scan completion"""
@@ -7,7 +7,6 @@ Combines enhanced classification with corrections AND comprehensive library mana
 import os
 import sys
 import json
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 import threading
@@ -28,7 +27,10 @@ from hierarchical_classifier import HierarchicalAudioClassifier
 from selecta_desktop_app_enhanced import (
     CorrectionLearningSystem, 
     CorrectionDialog, 
-    AudioLibraryScannerEnhanced
+    AudioLibraryScannerEnhanced,
+    reveal_in_file_manager,
+    QUEUE_DRAIN_MAX,
+    QUEUE_POLL_MS
 )
 from library_manager import LibraryManager, PlaylistManager, ExportManager
 from audio_player import AudioPlayerWidget
@@ -60,37 +62,22 @@ class BatchCorrectionDialog:
         self.create_dialog()
     
     def load_user_categories(self):
-        """Load user-created subcategories from database"""
+        """Merge the correction system's cached user subcategories into the base ones"""
         if not self.correction_system:
             self.sub_categories = self.base_sub_categories.copy()
             return
-            
-        try:
-            conn = sqlite3.connect(self.correction_system.corrections_db)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT main_category, sub_category 
-                FROM user_categories 
-                ORDER BY main_category, sub_category
-            ''')
-            
-            # Start with base categories
-            self.sub_categories = {}
-            for main_cat in self.main_categories:
-                self.sub_categories[main_cat] = self.base_sub_categories[main_cat].copy()
-            
-            # Add user categories
-            for main_cat, sub_cat in cursor.fetchall():
-                if main_cat in self.sub_categories:
+        
+        # Start with base categories
+        self.sub_categories = {}
+        for main_cat in self.main_categories:
+            self.sub_categories[main_cat] = self.base_sub_categories[main_cat].copy()
+        
+        # Add user categories
+        for main_cat, sub_cats in self.correction_system.user_sub_categories.items():
+            if main_cat in self.sub_categories:
+                for sub_cat in sub_cats:
                     if sub_cat not in self.sub_categories[main_cat]:
                         self.sub_categories[main_cat].append(sub_cat)
-            
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error loading user categories: {e}")
-            self.sub_categories = self.base_sub_categories.copy()
     
     def create_dialog(self):
         """Create the batch correction dialog"""
@@ -214,16 +201,7 @@ class BatchCorrectionDialog:
                 # Save to database if correction system available
                 if self.correction_system:
                     try:
-                        conn = sqlite3.connect(self.correction_system.corrections_db)
-                        cursor = conn.cursor()
-                        
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO user_categories (main_category, sub_category)
-                            VALUES (?, ?)
-                        ''', (main_cat, new_sub))
-                        
-                        conn.commit()
-                        conn.close()
+                        self.correction_system.add_user_category(main_cat, new_sub)
                         
                     except Exception as e:
                         print(f"Error saving new subcategory: {e}")
@@ -653,14 +631,23 @@ class UnifiedLibraryView:
             # Store current file ID before operations that might lose it
             current_file_id = self.selected_file['id']
             
-            if self.audio_player.load_file(self.selected_file['file_path'], self.selected_file['id']):
-                self.audio_player.toggle_play()
-                
-                # Update play stats
-                self.library_manager.update_play_stats(self.selected_file['id'])
-                
-                # Refresh the tree to show updated play count and restore selection
-                self.load_library(preserve_selection_file_id=current_file_id)
+            self.audio_player.load_file(
+                self.selected_file['file_path'], current_file_id,
+                on_loaded=lambda success: self._on_audio_loaded(success, current_file_id)
+            )
+    
+    def _on_audio_loaded(self, success: bool, file_id: int):
+        """Start playback once the audio player has loaded the file"""
+        if not success:
+            return
+        
+        self.audio_player.toggle_play()
+        
+        # Update play stats
+        self.library_manager.update_play_stats(file_id)
+        
+        # Refresh the tree to show updated play count and restore selection
+        self.load_library(preserve_selection_file_id=file_id)
     
     def show_context_menu(self, event):
         """Show context menu on right-click"""
@@ -854,17 +841,7 @@ Added: {file_data.get('created_at', 'Unknown')[:10]}"""
                 current_file_id = file_data['id']
                 
                 # Update database to mark as verified correct
-                conn = sqlite3.connect(self.scanner.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    UPDATE audio_files 
-                    SET user_verified = 'correct'
-                    WHERE id = ?
-                ''', (file_data['id'],))
-                
-                conn.commit()
-                conn.close()
+                self.scanner.set_user_verified(file_data['id'], 'correct')
                 
                 # Update local data
                 file_data['user_verified'] = 'correct'
@@ -921,17 +898,7 @@ Added: {file_data.get('created_at', 'Unknown')[:10]}"""
             )
             
             # Mark the file as verified incorrect in the database
-            conn = sqlite3.connect(self.scanner.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE audio_files 
-                SET user_verified = 'incorrect'
-                WHERE id = ?
-            ''', (original_result['id'],))
-            
-            conn.commit()
-            conn.close()
+            self.scanner.set_user_verified(original_result['id'], 'incorrect')
             
             # Refresh the display and restore selection
             self.load_library(preserve_selection_file_id=current_file_id)
@@ -1089,8 +1056,7 @@ Added: {file_data.get('created_at', 'Unknown')[:10]}"""
     def open_file_location(self):
         """Open file location in system file manager"""
         if self.selected_file and os.path.exists(self.selected_file['file_path']):
-            # Open file location (Mac)
-            os.system(f'open -R "{self.selected_file["file_path"]}"')
+            reveal_in_file_manager(self.selected_file['file_path'])
     
     def rate_selected(self):
         """Quick rate selected file"""
@@ -1174,12 +1140,19 @@ Added: {file_data.get('created_at', 'Unknown')[:10]}"""
                 # Load first track
                 first_track = tracks[0]
                 if os.path.exists(first_track['file_path']):
-                    if self.audio_player.load_file(first_track['file_path'], first_track['id']):
-                        self.audio_player.toggle_play()
-                        messagebox.showinfo("Playing", f"Playing playlist '{playlist['name']}'")
+                    self.audio_player.load_file(
+                        first_track['file_path'], first_track['id'],
+                        on_loaded=lambda success: self._on_playlist_loaded(success, playlist)
+                    )
             else:
                 messagebox.showinfo("Empty Playlist", "This playlist has no tracks.")
     
+    def _on_playlist_loaded(self, success: bool, playlist: Dict):
+        """Start playlist playback once the first track has loaded"""
+        if success:
+            self.audio_player.toggle_play()
+            messagebox.showinfo("Playing", f"Playing playlist '{playlist['name']}'")
+    
     def apply_batch_correction(self, files: List[Dict], correction: Dict):
         """Apply batch correction to multiple files"""
         try:
@@ -1244,6 +1217,7 @@ class UnifiedScannerView:
         self.parent = parent
         self.scanner = scanner
         self.scan_queue = queue.Queue()
+        self._wake_pending = threading.Event()  # a <<ScanUpdate>> is already on its way
         self.scan_thread = None
         self.is_scanning = False
         
@@ -1254,6 +1228,7 @@ class UnifiedScannerView:
         self.total_files = tk.IntVar()
         
         self.create_view()
+        self.parent.bind('<<ScanUpdate>>', self.drain_scan_queue)
     
     def create_view(self):
         """Create the scanner interface"""
@@ -1361,89 +1336,122 @@ class UnifiedScannerView:
         """Worker thread for scanning files"""
         try:
             # Scan for audio files
-            self.scan_queue.put(("status", "Scanning for audio files..."))
+            self.post_scan_message(("status", "Scanning for audio files..."))
             audio_files = self.scanner.scan_directory(
                 self.selected_directory.get(),
-                lambda msg: self.scan_queue.put(("progress", msg))
+                lambda msg: self.post_scan_message(("progress", msg))
             )
             
             if not audio_files:
-                self.scan_queue.put(("status", "No audio files found in directory"))
-                self.scan_queue.put(("complete", None))
+                self.post_scan_message(("status", "No audio files found in directory"))
+                self.post_scan_message(("complete", None))
                 return
             
-            self.scan_queue.put(("total", len(audio_files)))
+            self.post_scan_message(("total", len(audio_files)))
             
-            # Process each file
-            for i, file_path in enumerate(audio_files):
-                if not self.is_scanning:  # Check if stopped
-                    break
-                    
-                self.scan_queue.put(("progress", f"Classifying: {os.path.basename(file_path)}"))
-                
-                # Classify file
-                result = self.scanner.classify_file(file_path)
-                if result:
-                    # Save to database
-                    self.scanner.save_classification(result)
+            # Classify in model batches; this thread is the only database writer and saves in batches
+            classified = self.scanner.classify_files_batched(audio_files)
+            try:
+                for i, (file_path, result) in enumerate(classified, 1):
+                    if not self.is_scanning:  # Check if stopped
+                        break
+                        
+                    if result:
+                        # Unchanged files come back from the database and need no write
+                        if not result.get('cached'):
+                            self.scanner.queue_classification(result)
+                        
+                        # Send to UI
+                        self.post_scan_message(("result", result))
                     
-                    # Send to UI
-                    self.scan_queue.put(("result", result))
-                
-                self.scan_queue.put(("count", i + 1))
+                    self.post_scan_message(("count", i))
+            finally:
+                classified.close()
+                self.scanner.flush()
             
-            self.scan_queue.put(("complete", None))
+            self.post_scan_message(("complete", None))
             
         except Exception as e:
-            self.scan_queue.put(("error", str(e)))
+            self.post_scan_message(("error", str(e)))
+    
+    def post_scan_message(self, message):
+        """Queue a scan update and wake the Tk thread, with at most one wakeup in flight"""
+        self.scan_queue.put(message)
+        if not self._wake_pending.is_set():
+            self._wake_pending.set()
+            try:
+                self.parent.event_generate('<<ScanUpdate>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                pass  # Tk built without thread support; the check_queue poll delivers it
     
     def check_queue(self):
-        """Check the scan queue for updates"""
+        """Fallback poll while scanning, in case a wakeup event was lost"""
+        self.drain_scan_queue()
+        if self.is_scanning:
+            self.parent.after(QUEUE_POLL_MS, self.check_queue)
+    
+    def drain_scan_queue(self, event=None):
+        """Drain queued scan updates and apply them as one UI update"""
+        self._wake_pending.clear()
+        drained = 0
+        status = None
+        count = None
+        results = []
+        final = None
         try:
-            while True:
+            while drained < QUEUE_DRAIN_MAX:
                 msg_type, data = self.scan_queue.get_nowait()
+                drained += 1
                 
-                if msg_type == "status":
-                    self.scan_progress.set(data)
-                elif msg_type == "progress":
-                    self.scan_progress.set(data)
+                if msg_type in ("status", "progress"):
+                    status = data
                 elif msg_type == "total":
                     self.total_files.set(data)
                     self.progress_bar.config(maximum=data)
                 elif msg_type == "count":
-                    self.files_processed.set(data)
-                    self.progress_bar.config(value=data)
-                    self.scan_progress.set(f"Processed {data}/{self.total_files.get()} files")
+                    count = data
+                    status = f"Processed {data}/{self.total_files.get()} files"
                 elif msg_type == "result":
-                    self.add_result_to_tree(data)
-                elif msg_type == "complete":
-                    self.scan_complete()
-                    return
-                elif msg_type == "error":
-                    self.scan_error(data)
-                    return
+                    results.append(data)
+                elif msg_type in ("complete", "error"):
+                    final = (msg_type, data)
+                    break
                     
         except queue.Empty:
             pass
         
-        if self.is_scanning:
-            self.parent.after(100, self.check_queue)
+        # Insert the whole batch, then scroll once to its last row
+        if results:
+            for result in results:
+                last_item = self.add_result_to_tree(result)
+            self.results_tree.see(last_item)
+        
+        # Only the latest progress values are worth drawing
+        if count is not None:
+            self.files_processed.set(count)
+            self.progress_bar.config(value=count)
+        if status is not None:
+            self.scan_progress.set(status)
+        
+        if final:
+            if final[0] == "complete":
+                self.scan_complete()
+            else:
+                self.scan_error(final[1])
+        elif drained == QUEUE_DRAIN_MAX:
+            # More waiting; let Tk redraw before the next batch
+            self.parent.after_idle(self.drain_scan_queue)
     
     def add_result_to_tree(self, result):
-        """Add classification result to the tree view"""
+        """Add classification result to the tree view and return its item id"""
         filename = result['filename']
         main_cat = result['main_category']
         sub_cat = result.get('sub_category', '')
         main_conf = f"{result['main_confidence']:.3f}"
         
-        self.results_tree.insert('', 'end', values=(
+        return self.results_tree.insert('', 'end', values=(
             filename, main_cat, sub_cat, main_conf
         ))
-        
-        # Auto-scroll to bottom
-        children = self.results_tree.get_children()
-        if children:
-            self.results_tree.see(children[-1])
     
     def scan_complete(self):
         """Handle scan completion"""